@@ -1,55 +1,36 @@
 # api/app.py
 
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request
 import os
-import asyncio
-import threading
+import time
+import atexit
 import logging
-from src.telegram_bot import main as run_bot, load_config
+import concurrent.futures
+import yaml
+from src.settings import DEFAULT_CONFIG_PATH
+from src.lifecycle import BotLifecycle
+from src.metrics import REGISTRY, CONTENT_TYPE
+from src.event_store import MergedEventStore, ReactionEventStore
+from src.sharding import shard_path
 
 app = Flask(__name__)
 
-# Global variables to manage the bot state and threading
-bot_running = False
-bot_thread = None
+# The bot runs on one long-lived event loop thread owned by the lifecycle manager
+lifecycle = BotLifecycle(DEFAULT_CONFIG_PATH)
+atexit.register(lifecycle.shutdown)
+event_store = None
 
-def start_bot():
-    """Function to run the bot in a separate thread."""
-    global bot_running
-
-    if bot_running:
-        app.logger.info("Bot is already running.")
-        return
-
-    try:
-        # Load configuration
-        config = load_config()
-
-        # Create and start a new event loop for the bot
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-
-        # Run the bot asynchronously
-        loop.run_until_complete(run_bot())
-
-        bot_running = True
-        app.logger.info("Bot started successfully.")
-    except Exception as e:
-        bot_running = False
-        app.logger.error(f"Failed to start bot: {e}")
+# Seconds /stop-bot waits for queued notifications to drain before answering
+STOP_TIMEOUT = 30
 
 @app.route('/start-bot', methods=['POST'])
 def start_bot_endpoint():
-    global bot_running, bot_thread
-
-    if bot_running:
+    if lifecycle.state in ('starting', 'running'):
         return jsonify({'status': 'Bot is already running.'}), 200
 
     try:
-        # Start the bot in a separate thread
-        bot_thread = threading.Thread(target=start_bot, daemon=True)
-        bot_thread.start()
-
+        # Progress and errors of the start are reported by /status
+        lifecycle.start()
         return jsonify({'status': 'Bot is starting...'}), 202
     except Exception as e:
         app.logger.error(f"Error starting bot: {e}")
@@ -57,26 +38,90 @@ def start_bot_endpoint():
 
 @app.route('/stop-bot', methods=['POST'])
 def stop_bot():
-    global bot_running
-
-    if not bot_running:
+    if lifecycle.state == 'stopped':
         return jsonify({'status': 'Bot is not running.'}), 200
 
     try:
-        # Stop the bot by interrupting the event loop
-        if bot_thread and bot_thread.is_alive():
-            bot_running = False
-            app.logger.info("Bot stopped successfully.")
+        if lifecycle.stop().result(STOP_TIMEOUT):
             return jsonify({'status': 'Bot stopped successfully.'}), 200
-        else:
-            return jsonify({'status': 'Bot is not running.'}), 200
+        return jsonify({'status': 'Bot is not running.'}), 200
+    except concurrent.futures.TimeoutError:
+        return jsonify({'status': 'Bot is stopping...'}), 202
     except Exception as e:
         app.logger.error(f"Error stopping bot: {e}")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/reload-bot', methods=['POST'])
+def reload_bot():
+    if not lifecycle.running:
+        return jsonify({'status': 'Bot is not running.'}), 200
+
+    try:
+        lifecycle.reload()
+        return jsonify({'status': 'Bot is reloading...'}), 202
+    except Exception as e:
+        app.logger.error(f"Error reloading bot: {e}")
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/status', methods=['GET'])
 def status():
-    return jsonify({'bot_running': bot_running})
+    return jsonify(lifecycle.status())
+
+REGISTRY.callback('reaction_bot_running', 'Whether the bot is running (1) or not (0).', lambda: int(lifecycle.running))
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    return Response(REGISTRY.render(), content_type=CONTENT_TYPE)
+
+def get_event_store():
+    """Return the reaction event store configured for the bot, merged over the shards' databases if sharded."""
+    global event_store
+    if event_store is None:
+        # Only the event_store and sharding sections are needed, so the Telegram credentials need not be set
+        with open(DEFAULT_CONFIG_PATH, 'r') as file:
+            config = yaml.safe_load(file) or {}
+        settings = config.get('event_store') or {}
+        sessions = (config.get('sharding') or {}).get('sessions') or []
+        event_store = ReactionEventStore.from_config(settings)
+        if sessions:
+            # Every shard writes its own database; the unsuffixed one keeps what single-process runs recorded
+            path = settings.get('path', 'data/reactions.db')
+            event_store = MergedEventStore([event_store] + [
+                ReactionEventStore.from_config({**settings, 'path': shard_path(path, session)})
+                for session in sessions])
+    return event_store
+
+@app.route('/reactions/top', methods=['GET'])
+def top_reactions():
+    try:
+        hours = request.args.get('hours', 168, type=float)
+        limit = request.args.get('limit', 10, type=int)
+        channel_id = request.args.get('channel_id', type=int)
+        since = time.time() - hours * 3600
+        messages = get_event_store().top_messages(since, limit, channel_id)
+        return jsonify({'since': since, 'messages': messages})
+    except Exception as e:
+        app.logger.error(f"Error querying top reactions: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/reactions/timeseries', methods=['GET'])
+def reaction_timeseries():
+    channel_id = request.args.get('channel_id', type=int)
+    if channel_id is None:
+        return jsonify({'error': 'channel_id is required'}), 400
+
+    try:
+        hours = request.args.get('hours', 24, type=float)
+        bucket = request.args.get('bucket', 3600, type=int)
+        message_id = request.args.get('message_id', type=int)
+        since = time.time() - hours * 3600
+        points = get_event_store().time_series(channel_id, since, message_id=message_id, bucket=bucket)
+        return jsonify({'since': since, 'bucket': bucket, 'points': points})
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        app.logger.error(f"Error querying reaction time series: {e}")
+        return jsonify({'error': str(e)}), 500
 
 def create_app():
     """Factory function to create and configure the Flask app."""
@@ -0,0 +1 @@
+# Benchmarks and load tests for the reaction bot, run against a fake Telegram client
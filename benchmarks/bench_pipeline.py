@@ -0,0 +1,147 @@
+"""End-to-end throughput benchmark of the reaction pipeline against a fake Telegram client.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_pipeline --events 20000 --channels 50
+    python -m benchmarks.bench_pipeline --rate 2000 --send-latency 0.05 --flood-wait-rate 0.01 --json
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+from unittest.mock import patch
+
+from benchmarks.fake_client import FakeTelegramClient, reaction_stream
+from src import telegram_bot
+
+FIRST_CHANNEL_ID = 1000
+
+
+def benchmark_config(directory: str, fetch_user_data: bool = False, per_chat_rate: float = 0,
+                     batch_window: float = 0.05, workers: int = 8) -> Dict[str, Any]:
+    """Return a bot configuration that keeps all files inside ``directory``."""
+    return {
+        'telegram': {'owner_id': 42},
+        'health_check': {'interval': 3600},
+        'notifications': {'retry_attempts': 3, 'retry_delay': 0.01, 'batch_window': batch_window,
+                          'max_batch': 1000, 'max_queue': 10000, 'max_users': 5},
+        'advanced_settings': {'max_reactions_per_message': 100, 'fetch_user_data': fetch_user_data},
+        'rate_limits': {'global_rate': 0, 'per_chat_rate': per_chat_rate, 'max_delay': 0.1},
+        'reaction_state': {'snapshot_path': os.path.join(directory, 'reaction_state.json.gz'),
+                           'snapshot_interval': 3600},
+        'event_store': {'path': os.path.join(directory, 'reactions.db')},
+        'dispatcher': {'workers': workers, 'max_per_channel': 100000, 'max_total': 1000000},
+        # Replays never went through the fake client's dispatch, so they would skew the measured latencies
+        'catch_up': {'enabled': False},
+    }
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Return the value below which ``fraction`` of ``values`` fall (nearest rank)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def peak_rss_mb() -> float:
+    """Return the peak resident set size of this process in megabytes."""
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return usage / (1024 * 1024) if sys.platform == 'darwin' else usage / 1024
+
+
+async def run_pipeline_benchmark(events: int = 10000, channels: int = 10, messages_per_channel: int = 50,
+                                 rate: float = 0, participants: int = 20, lookup_latency: float = 0.0,
+                                 send_latency: float = 0.0, flood_wait_rate: float = 0.0,
+                                 flood_wait_seconds: int = 1, fetch_user_data: bool = False,
+                                 per_chat_rate: float = 0, workers: int = 8,
+                                 directory: Optional[str] = None) -> Dict[str, Any]:
+    """Feed synthetic reaction updates through :class:`ReactionBot` and report throughput and latency.
+
+    Latency is measured per update, from dispatch by the fake client to the
+    end of :func:`process_reactions`. The elapsed time also covers draining
+    the queues and flushing the last notifications on shutdown.
+    """
+    with tempfile.TemporaryDirectory() as tmp_directory:
+        config = benchmark_config(directory or tmp_directory, fetch_user_data, per_chat_rate, workers=workers)
+        client = FakeTelegramClient(participants=participants, lookup_latency=lookup_latency,
+                                    send_latency=send_latency, flood_wait_rate=flood_wait_rate,
+                                    flood_wait_seconds=flood_wait_seconds, rate=rate)
+        client.feed(reaction_stream(events, channels, messages_per_channel, first_channel_id=FIRST_CHANNEL_ID))
+
+        latencies: List[float] = []
+        process_reactions = telegram_bot.process_reactions
+
+        async def timed_process_reactions(event, *args, **kwargs):
+            await process_reactions(event, *args, **kwargs)
+            latencies.append(time.perf_counter() - client.dispatched_at.pop(id(event)))
+
+        with patch.object(telegram_bot, 'process_reactions', timed_process_reactions):
+            bot = telegram_bot.ReactionBot(client, config, config_path=None)
+            for channel_id in range(FIRST_CHANNEL_ID, FIRST_CHANNEL_ID + channels):
+                bot.state_store.track(channel_id, 0)  # Tracked since before the synthetic messages were posted
+            started = time.perf_counter()
+            await bot.run()
+            elapsed = time.perf_counter() - started
+
+    return {
+        'events': events,
+        'channels': channels,
+        'processed': len(latencies),
+        'dropped': bot.dispatcher.dropped,
+        'failed': bot.dispatcher.failed,
+        'elapsed_seconds': round(elapsed, 3),
+        'events_per_second': round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        'p50_latency_ms': round(percentile(latencies, 0.50) * 1000, 3),
+        'p99_latency_ms': round(percentile(latencies, 0.99) * 1000, 3),
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+        'outbound_calls': dict(client.calls),
+        'notifications_sent': len(client.sent),
+        'rate_limiter': bot.rate_limiter.stats(),
+        'attribution': bot.attribution.stats(),
+    }
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--events', type=int, default=10000, help="number of reaction updates to generate")
+    parser.add_argument('--channels', type=int, default=10, help="number of channels the updates are spread over")
+    parser.add_argument('--messages-per-channel', type=int, default=50)
+    parser.add_argument('--rate', type=float, default=0, help="updates per second, 0 for as fast as possible")
+    parser.add_argument('--participants', type=int, default=20, help="number of users that react")
+    parser.add_argument('--lookup-latency', type=float, default=0.0, help="seconds per reactor list request")
+    parser.add_argument('--send-latency', type=float, default=0.0, help="seconds per send_message call")
+    parser.add_argument('--flood-wait-rate', type=float, default=0.0,
+                        help="fraction of send_message calls that raise FloodWaitError")
+    parser.add_argument('--flood-wait-seconds', type=int, default=1)
+    parser.add_argument('--fetch-user-data', action='store_true', help="attribute reactions to users")
+    parser.add_argument('--per-chat-rate', type=float, default=0, help="per-chat send rate, 0 for unlimited")
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--json', action='store_true', help="print the report as JSON")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    report = asyncio.run(run_pipeline_benchmark(
+        events=args.events, channels=args.channels, messages_per_channel=args.messages_per_channel,
+        rate=args.rate, participants=args.participants, lookup_latency=args.lookup_latency,
+        send_latency=args.send_latency, flood_wait_rate=args.flood_wait_rate,
+        flood_wait_seconds=args.flood_wait_seconds, fetch_user_data=args.fetch_user_data,
+        per_chat_rate=args.per_chat_rate, workers=args.workers))
+
+    if args.json:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+        return
+    for key, value in report.items():
+        print(f"{key:>20}: {value}")
+
+
+if __name__ == '__main__':
+    main()
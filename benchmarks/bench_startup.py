@@ -0,0 +1,155 @@
+"""Cold start benchmark: import, config and import-to-ready times of the bot and the API.
+
+Every sample runs in a fresh interpreter so nothing is cached in ``sys.modules``.
+Run from the repository root:
+
+    python -m benchmarks.bench_startup --repeat 10
+    python -m benchmarks.bench_startup --profile-imports --json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+REPOSITORY_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Placeholders so load_config accepts the environment; nothing connects to Telegram
+BENCHMARK_ENV = {
+    'TELEGRAM_API_ID': '1',
+    'TELEGRAM_API_HASH': 'benchmark',
+    'TELEGRAM_BOT_TOKEN': 'benchmark',
+    'OWNER_USER_ID': '1',
+    'LOG_LEVEL': 'WARNING',
+}
+
+# Runs in the child interpreter and prints the phase timings as JSON
+BOT_STARTUP = r'''
+import time
+started = time.perf_counter()
+import asyncio, json, os, sys, tempfile
+from src import telegram_bot
+imported = time.perf_counter()
+telethon_imported = any(name.startswith('telethon') for name in sys.modules)
+config = telegram_bot.load_config(sys.argv[1])
+configured = time.perf_counter()
+
+async def start(directory):
+    config['telegram']['session_name'] = os.path.join(directory, 'benchmark')
+    config['event_store']['path'] = os.path.join(directory, 'reactions.db')
+    config['reaction_state']['snapshot_path'] = os.path.join(directory, 'reaction_state.json.gz')
+    client = telegram_bot.create_telegram_client(config['telegram']['session_name'],
+                                                 config['telegram']['api_id'], config['telegram']['api_hash'])
+    bot = telegram_bot.ReactionBot(client, config, config_path=None)
+    await bot.start()
+    ready = time.perf_counter()
+    await bot.stop()
+    return ready
+
+with tempfile.TemporaryDirectory() as directory:
+    ready = asyncio.run(start(directory))
+print(json.dumps({'import_seconds': imported - started, 'config_seconds': configured - imported,
+                  'ready_seconds': ready - started, 'telethon_imported': telethon_imported}))
+'''
+
+API_IMPORT = r'''
+import time
+started = time.perf_counter()
+import json, sys
+import api.app
+imported = time.perf_counter()
+print(json.dumps({'import_seconds': imported - started,
+                  'telethon_imported': any(name.startswith('telethon') for name in sys.modules)}))
+'''
+
+
+def run_child(code: str, args: List[str] = (), profile_imports: bool = False) -> Dict[str, Any]:
+    """Run ``code`` in a fresh interpreter and return its JSON output plus the wall-clock time."""
+    command = [sys.executable]
+    if profile_imports:
+        command += ['-X', 'importtime']
+    command += ['-c', code, *args]
+    env = {**BENCHMARK_ENV, **os.environ}
+    started = time.perf_counter()
+    result = subprocess.run(command, cwd=REPOSITORY_ROOT, env=env, capture_output=True, text=True, check=True)
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+    report['process_seconds'] = time.perf_counter() - started
+    if profile_imports:
+        report['slowest_imports'] = slowest_imports(result.stderr)
+    return report
+
+
+def slowest_imports(importtime_output: str, limit: int = 15) -> List[Dict[str, Any]]:
+    """Parse ``-X importtime`` output into the top-level packages that took the longest to import.
+
+    Each package is charged the self time of all of its modules, so nested
+    imports are attributed to the package they belong to, not to whoever
+    imported them first.
+    """
+    packages: Dict[str, int] = {}
+    for line in importtime_output.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_time, _, name = line[len('import time:'):].split('|')
+        package = name.strip().split('.')[0]
+        packages[package] = packages.get(package, 0) + int(self_time)
+    top = sorted(packages.items(), key=lambda item: item[1], reverse=True)[:limit]
+    return [{'package': name, 'milliseconds': round(microseconds / 1000, 1)} for name, microseconds in top]
+
+
+def summarize(samples: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Return the median of each timing over the samples, in milliseconds."""
+    summary: Dict[str, Any] = {}
+    for key, value in samples[0].items():
+        if key.endswith('_seconds'):
+            summary[key.replace('_seconds', '_ms')] = round(statistics.median(s[key] for s in samples) * 1000, 1)
+        else:
+            summary[key] = value
+    return summary
+
+
+def run_startup_benchmark(repeat: int = 5, config_path: str = 'config/config.yaml',
+                          profile_imports: bool = False) -> Dict[str, Any]:
+    """Measure bot and API cold starts ``repeat`` times each and report the medians."""
+    bot = [run_child(BOT_STARTUP, [config_path]) for _ in range(repeat)]
+    api = [run_child(API_IMPORT) for _ in range(repeat)]
+    report = {'repeat': repeat, 'bot': summarize(bot), 'api': summarize(api)}
+    if profile_imports:
+        report['bot']['slowest_imports'] = run_child(BOT_STARTUP, [config_path], profile_imports=True)['slowest_imports']
+        report['api']['slowest_imports'] = run_child(API_IMPORT, profile_imports=True)['slowest_imports']
+    return report
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5, help="fresh interpreters started per measurement")
+    parser.add_argument('--config', default='config/config.yaml', help="config file the bot loads")
+    parser.add_argument('--profile-imports', action='store_true',
+                        help="also list the packages slowest to import, using python -X importtime")
+    parser.add_argument('--json', action='store_true', help="print the report as JSON")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    report = run_startup_benchmark(args.repeat, args.config, args.profile_imports)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    for section in ('bot', 'api'):
+        print(f"{section}:")
+        for key, value in report[section].items():
+            if key == 'slowest_imports':
+                print(f"{key:>34}:")
+                for entry in value:
+                    print(f"{entry['package']:>34}: {entry['milliseconds']} ms")
+            else:
+                print(f"{key:>34}: {value}")
+
+
+if __name__ == '__main__':
+    main()
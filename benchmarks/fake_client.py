@@ -0,0 +1,221 @@
+import asyncio
+import inspect
+import random
+import time
+from collections import Counter
+from types import SimpleNamespace
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, Tuple
+
+from telethon.errors import FloodWaitError
+from telethon.tl.functions.messages import GetMessageReactionsListRequest, GetMessagesReactionsRequest
+from telethon.tl.types import (MessagePeerReaction, MessageReactions, PeerChannel, PeerUser, ReactionCount,
+                               ReactionEmoji, UpdateMessageReactions)
+
+from src.reaction_state import reaction_counts, reaction_key
+
+DEFAULT_EMOJIS = ('👍', '🔥', '❤', '😂', '🎉')
+
+
+def make_user(user_id: int, bot: bool = False) -> SimpleNamespace:
+    """Return a stand-in for a Telethon ``User``."""
+    return SimpleNamespace(id=user_id, bot=bot, username=f"user{user_id}", first_name="Test", last_name=str(user_id))
+
+
+def make_update(channel_id: int, message_id: int, counts: Dict[str, int]) -> UpdateMessageReactions:
+    """Return a reaction update carrying ``counts`` for one channel message."""
+    return UpdateMessageReactions(
+        peer=PeerChannel(channel_id),
+        msg_id=message_id,
+        reactions=MessageReactions(results=[
+            ReactionCount(reaction=ReactionEmoji(emoticon=emoji), count=count) for emoji, count in counts.items()
+        ]),
+    )
+
+
+def reaction_stream(count: int, channels: int = 10, messages_per_channel: int = 50,
+                    emojis: Tuple[str, ...] = DEFAULT_EMOJIS, seed: int = 0,
+                    first_channel_id: int = 1000) -> Iterator[UpdateMessageReactions]:
+    """Yield ``count`` synthetic reaction updates whose counts only ever grow.
+
+    Each update adds one reaction to a random message, so every update
+    carries a real change for the reaction-diff stage.
+    """
+    rng = random.Random(seed)
+    counts: Dict[Tuple[int, int], Dict[str, int]] = {}
+    for _ in range(count):
+        channel_id = first_channel_id + rng.randrange(channels)
+        message_id = rng.randrange(1, messages_per_channel + 1)
+        emoji = rng.choice(emojis)
+        message_counts = counts.setdefault((channel_id, message_id), {})
+        message_counts[emoji] = message_counts.get(emoji, 0) + 1
+        yield make_update(channel_id, message_id, message_counts)
+
+
+class FakeTelegramClient:
+    """Local stand-in for ``TelegramClient`` that replays synthetic updates.
+
+    Updates passed to :meth:`feed` are dispatched to the registered event
+    handlers the way Telethon does it (the builder's filter first, then the
+    callback) at ``rate`` updates per second, or as fast as possible when
+    ``rate`` is 0. ``run_until_disconnected`` returns once every update has
+    been dispatched, or with ``linger`` once :meth:`disconnect` is called.
+    Raw ``GetMessageReactionsListRequest`` and ``send_message`` calls sleep
+    for the configured latencies, and ``send_message`` raises
+    ``FloodWaitError`` for a ``flood_wait_rate`` fraction of calls.
+    ``reactions`` holds the current counts per (channel, message) served by
+    ``get_messages`` and by raw ``GetMessagesReactionsRequest`` calls, and
+    ``reactors`` the user IDs behind each emoji, newest first, served by
+    ``GetMessageReactionsListRequest``. Dispatched updates keep both up to
+    date, picking each new reactor at random among ``participants`` users.
+    """
+
+    def __init__(self, participants: int = 20, lookup_latency: float = 0.0, send_latency: float = 0.0,
+                 flood_wait_rate: float = 0.0, flood_wait_seconds: int = 1, rate: float = 0, seed: int = 0,
+                 linger: bool = False) -> None:
+        self.participants = participants
+        self.lookup_latency = lookup_latency
+        self.send_latency = send_latency
+        self.flood_wait_rate = flood_wait_rate
+        self.flood_wait_seconds = flood_wait_seconds
+        self.rate = rate
+        self.linger = linger
+        self.calls: Counter = Counter()
+        self.sent: List[Tuple[int, str]] = []
+        self.dispatched_at: Dict[int, float] = {}
+        self.reactions: Dict[Tuple[int, int], Dict[str, int]] = {}
+        self.reactors: Dict[Tuple[int, int], Dict[str, List[int]]] = {}
+        self._rng = random.Random(seed)
+        self._reactor_rng = random.Random(seed)
+        self._handlers: List[Tuple[Any, Callable[[Any], Awaitable[None]]]] = []
+        self._updates: List[Any] = []
+        self._connected = False
+
+    # Event handling
+
+    def add_event_handler(self, callback: Callable[[Any], Awaitable[None]], event: Any = None) -> None:
+        if isinstance(event, type):
+            event = event()
+        self._handlers.append((event, callback))
+
+    def remove_event_handler(self, callback: Callable[[Any], Awaitable[None]], event: Any = None) -> int:
+        before = len(self._handlers)
+        self._handlers = [(builder, handler) for builder, handler in self._handlers
+                          if handler != callback or (event is not None and not isinstance(builder, event))]
+        return before - len(self._handlers)
+
+    def on(self, event: Any) -> Callable:
+        def decorator(callback):
+            self.add_event_handler(callback, event)
+            return callback
+        return decorator
+
+    def feed(self, updates: Any) -> None:
+        """Queue updates to be dispatched by :meth:`run_until_disconnected`."""
+        self._updates.extend(updates)
+
+    async def dispatch(self, update: Any) -> None:
+        """Dispatch one update to the handlers, as Telethon does."""
+        self.dispatched_at[id(update)] = time.perf_counter()
+        if isinstance(update, UpdateMessageReactions):
+            self._record(update)
+        for builder, callback in self._handlers:
+            passed = builder.filter(update) if builder is not None else True
+            if inspect.isawaitable(passed):
+                passed = await passed
+            if passed:
+                await callback(update)
+
+    def _record(self, update: UpdateMessageReactions) -> None:
+        """Apply an update to the server-side reaction state, as Telegram would have before sending it."""
+        key = (update.peer.channel_id, update.msg_id)
+        counts = reaction_counts(update.reactions.results)
+        self.reactions[key] = counts
+        message_reactors = self.reactors.setdefault(key, {})
+        for emoji, count in counts.items():
+            reactors = message_reactors.setdefault(emoji, [])
+            candidates = [user_id for user_id in range(1, self.participants + 1) if user_id not in reactors]
+            for _ in range(min(count - len(reactors), len(candidates))):
+                reactors.insert(0, candidates.pop(self._reactor_rng.randrange(len(candidates))))
+
+    # Connection
+
+    async def start(self) -> 'FakeTelegramClient':
+        self._connected = True
+        return self
+
+    async def connect(self) -> None:
+        self._connected = True
+
+    def is_connected(self) -> bool:
+        return self._connected
+
+    async def disconnect(self) -> None:
+        self._connected = False
+
+    async def run_until_disconnected(self) -> None:
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        updates, self._updates = self._updates, []
+        for index, update in enumerate(updates):
+            if not self._connected:
+                break
+            if self.rate > 0:
+                delay = started + index / self.rate - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            elif index % 100 == 0:
+                await asyncio.sleep(0)  # Let the pipeline run, as a real connection would
+            await self.dispatch(update)
+        while self.linger and self._connected:
+            await asyncio.sleep(0.01)
+        self._connected = False
+
+    # Outbound calls
+
+    async def get_entity(self, entity: Any) -> Any:
+        self.calls['get_entity'] += 1
+        if isinstance(entity, list):
+            return [make_user(user_id) for user_id in entity]
+        return make_user(entity)
+
+    async def get_messages(self, entity: Any, limit: Optional[int] = None) -> List[SimpleNamespace]:
+        self.calls['get_messages'] += 1
+        channel_id = getattr(entity, 'channel_id', entity)
+        message_ids = sorted((message_id for key_channel, message_id in self.reactions if key_channel == channel_id),
+                             reverse=True)
+        return [SimpleNamespace(id=message_id) for message_id in message_ids[:limit]]
+
+    async def __call__(self, request: Any) -> Any:
+        self.calls[type(request).__name__] += 1
+        if isinstance(request, GetMessagesReactionsRequest):
+            channel_id = request.peer.channel_id
+            return SimpleNamespace(updates=[
+                make_update(channel_id, message_id, self.reactions[(channel_id, message_id)])
+                for message_id in request.id if (channel_id, message_id) in self.reactions
+            ])
+        if isinstance(request, GetMessageReactionsListRequest):
+            if self.lookup_latency:
+                await asyncio.sleep(self.lookup_latency)
+            reactors = self.reactors.get((request.peer.channel_id, request.id), {})
+            reactors = reactors.get(reaction_key(request.reaction), [])
+            start = int(request.offset or 0)
+            page = reactors[start:start + request.limit]
+            end = start + len(page)
+            return SimpleNamespace(
+                count=len(reactors),
+                reactions=[MessagePeerReaction(peer_id=PeerUser(user_id), date=None, reaction=request.reaction)
+                           for user_id in page],
+                users=[make_user(user_id) for user_id in page], chats=[],
+                next_offset=str(end) if end < len(reactors) else None,
+            )
+        raise NotImplementedError(f"FakeTelegramClient does not handle {type(request).__name__}")
+
+    async def send_message(self, entity: Any, message: str) -> SimpleNamespace:
+        self.calls['send_message'] += 1
+        if self.send_latency:
+            await asyncio.sleep(self.send_latency)
+        if self.flood_wait_rate and self._rng.random() < self.flood_wait_rate:
+            self.calls['flood_wait'] += 1
+            raise FloodWaitError(request=None, capture=self.flood_wait_seconds)
+        self.sent.append((entity, message))
+        return SimpleNamespace(id=len(self.sent), message=message)
@@ -1,23 +1,46 @@
-# Import key functions and classes for convenient package-level access
-from .telegram_bot import (
-    load_config,
-    setup_logging,
-    create_telegram_client,
-    process_reactions,
-    send_message,
-    send_message_with_retry,
-    monitor_bot_health,
-    main,
-)
+# Key functions and classes for convenient package-level access. They are imported on first
+# access, so importing one submodule does not pull in the bot, Telethon and everything else.
+import importlib
+from typing import Any
+
+_EXPORTS = {
+    "load_config": "telegram_bot",
+    "setup_logging": "telegram_bot",
+    "shutdown_logging": "telegram_bot",
+    "create_telegram_client": "telegram_bot",
+    "process_reactions": "telegram_bot",
+    "send_message": "telegram_bot",
+    "send_message_with_retry": "telegram_bot",
+    "monitor_bot_health": "telegram_bot",
+    "ReactionBot": "telegram_bot",
+    "main": "telegram_bot",
+    "BotSettings": "settings",
+    "ReactionAttribution": "attribution",
+    "UserCache": "attribution",
+    "ReactionStateStore": "reaction_state",
+    "NotificationQueue": "notifier",
+    "ReactionNotice": "notifier",
+    "RateLimiter": "rate_limiter",
+    "TokenBucket": "rate_limiter",
+    "UpdateDispatcher": "dispatcher",
+    "UpdateFilter": "update_filter",
+    "ReactionEventStore": "event_store",
+    "ReactionCatchUp": "catch_up",
+    "REGISTRY": "metrics",
+    "BotLifecycle": "lifecycle",
+    "HashRing": "sharding",
+    "NotificationDedup": "sharding",
+    "ShardSupervisor": "sharding",
+}
+
+
+def __getattr__(name: str) -> Any:
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{_EXPORTS[name]}", __name__), name)
+    globals()[name] = value
+    return value
+
 
 # Define what is accessible when importing *
-__all__ = [
-    "load_config",
-    "setup_logging",
-    "create_telegram_client",
-    "process_reactions",
-    "send_message",
-    "send_message_with_retry",
-    "monitor_bot_health",
-    "main",
-]
+__all__ = list(_EXPORTS)
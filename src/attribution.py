@@ -0,0 +1,198 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from src.rate_limiter import RateLimiter, method_key
+
+
+class UnresolvedUser(NamedTuple):
+    """Stand-in for a reactor whose user entity could not be resolved."""
+    id: int
+    username: Optional[str] = None
+    first_name: Optional[str] = None
+    last_name: Optional[str] = None
+    bot: bool = False
+
+
+def reaction_for_key(key: str) -> Any:
+    """Return the Telegram reaction for a key made by ``reaction_key``, or None if it cannot be filtered on."""
+    from telethon.tl.types import ReactionCustomEmoji, ReactionEmoji
+    if key.startswith('custom:'):
+        return ReactionCustomEmoji(document_id=int(key[len('custom:'):]))
+    if key[:1].isupper() and key.isidentifier():
+        return None  # A reaction type name such as ReactionPaid
+    return ReactionEmoji(emoticon=key)
+
+
+def _unsupported_errors() -> Tuple[type, ...]:
+    """Errors meaning a channel does not expose its reactors to us."""
+    from telethon.errors import BroadcastForbiddenError, ChatAdminRequiredError
+    return BroadcastForbiddenError, ChatAdminRequiredError
+
+
+class UserCache:
+    """Bounded LRU cache of user entities with a TTL, shared by every channel."""
+
+    def __init__(self, max_users: int = 10000, ttl: float = 3600,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        self.max_users = max_users
+        self.ttl = ttl
+        self._clock = clock
+        self._users: 'OrderedDict[int, Tuple[Any, float]]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._users)
+
+    def get(self, user_id: int) -> Optional[Any]:
+        """Return the cached user, or None if it is unknown or expired."""
+        entry = self._users.get(user_id)
+        if entry is None or self._clock() - entry[1] >= self.ttl:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._users.move_to_end(user_id)
+        return entry[0]
+
+    def put(self, users: Iterable[Any]) -> None:
+        """Cache users, keeping a full entity over a ``min`` one Telegram sent without the details."""
+        now = self._clock()
+        for user in users:
+            cached = self._users.get(user.id)
+            if getattr(user, 'min', False) and cached is not None:
+                user = cached[0]
+            self._users[user.id] = (user, now)
+            self._users.move_to_end(user.id)
+        while len(self._users) > self.max_users:
+            self._users.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, int]:
+        """Return cache counters."""
+        return {'users': len(self._users), 'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions}
+
+
+class ReactionAttribution:
+    """Attribute new reactions to the users who actually made them.
+
+    For each emoji whose count increased, the newest reactors of the message
+    are fetched with ``messages.getMessageReactionsList`` filtered to that
+    emoji, one page at a time until ``delta`` reactors (at most
+    ``max_reactors``) are known. The cost of a notification therefore grows
+    with the number of new reactions, not with the size of the channel.
+    Users sent along with the lists fill a :class:`UserCache`; reactors left
+    out of a response are looked up there first and the rest resolved in a
+    single batch. Channels that do not expose their reactors, such as
+    broadcast channels, are remembered and not asked again.
+    """
+
+    def __init__(self, user_cache: Optional[UserCache] = None, rate_limiter: Optional[RateLimiter] = None,
+                 page_size: int = 100, max_reactors: int = 100) -> None:
+        self.user_cache = user_cache if user_cache is not None else UserCache()
+        self.rate_limiter = rate_limiter if rate_limiter is not None else RateLimiter.unlimited()
+        self.page_size = page_size
+        self.max_reactors = max_reactors
+        self._unsupported: Set[int] = set()
+        self.lookups = 0
+        self.requests = 0
+        self.resolves = 0
+        self.failures = 0
+
+    @classmethod
+    def from_config(cls, settings: Dict[str, Any], rate_limiter: Optional[RateLimiter] = None) -> 'ReactionAttribution':
+        """Build an attribution engine from the ``attribution`` config section."""
+        user_cache = UserCache(max_users=settings.get('max_users', 10000), ttl=settings.get('user_ttl', 3600))
+        return cls(user_cache, rate_limiter,
+                   page_size=settings.get('page_size', 100),
+                   max_reactors=settings.get('max_reactors', 100))
+
+    async def _fetch_reactors(self, client: Any, channel_id: int, message_id: int, reaction: Any,
+                              wanted: int) -> List[int]:
+        from telethon.tl.functions.messages import GetMessageReactionsListRequest
+        from telethon.tl.types import PeerChannel
+        reactors: List[int] = []
+        offset = None
+        while len(reactors) < wanted:
+            request = GetMessageReactionsListRequest(peer=PeerChannel(channel_id), id=message_id, reaction=reaction,
+                                                     limit=min(wanted - len(reactors), self.page_size), offset=offset)
+            self.requests += 1
+            result = await self.rate_limiter.call(method_key(type(request).__name__), lambda: client(request))
+            self.user_cache.put(user for user in result.users if hasattr(user, 'id'))
+            for reactor in result.reactions:
+                user_id = getattr(reactor.peer_id, 'user_id', None)
+                if user_id is not None and user_id not in reactors:
+                    reactors.append(user_id)
+            offset = result.next_offset
+            if not offset or not result.reactions:
+                break
+        return reactors[:wanted]
+
+    async def _resolve(self, client: Any, user_ids: Iterable[int]) -> Dict[int, Any]:
+        users: Dict[int, Any] = {}
+        unknown = []
+        for user_id in dict.fromkeys(user_ids):
+            user = self.user_cache.get(user_id)
+            if user is not None:
+                users[user_id] = user
+            else:
+                unknown.append(user_id)
+        if unknown:
+            self.resolves += 1
+            try:
+                resolved = await self.rate_limiter.call(method_key('GetUsersRequest'),
+                                                       lambda: client.get_entity(unknown))
+            except Exception as e:
+                logging.warning("Failed to resolve %d reacting users: %s", len(unknown), e,
+                                extra={'category': 'attribution'})
+                resolved = []
+            self.user_cache.put(resolved)
+            users.update((user.id, user) for user in resolved)
+        return users
+
+    async def _lookup(self, client: Any, channel_id: int, message_id: int, emoji: str, delta: int) -> List[int]:
+        reaction = reaction_for_key(emoji)
+        if reaction is None:
+            return []
+        try:
+            return await self._fetch_reactors(client, channel_id, message_id, reaction, min(delta, self.max_reactors))
+        except _unsupported_errors() as e:
+            logging.info("Reactors of channel %s are not available, reactions will not be attributed: %s",
+                         channel_id, e, extra={'category': 'attribution', 'channel_id': channel_id})
+            self._unsupported.add(channel_id)
+        except Exception as e:
+            self.failures += 1
+            logging.warning("Failed to fetch %s reactors of message %s in channel %s: %s", emoji, message_id,
+                            channel_id, e, extra={'category': 'attribution', 'channel_id': channel_id,
+                                                  'message_id': message_id, 'emoji': emoji})
+        return []
+
+    async def attribute(self, client: Any, channel_id: int, message_id: int,
+                        changes: List[Tuple[str, int]]) -> Dict[str, List[Any]]:
+        """Return the newest reactors of each changed emoji of a message, newest first.
+
+        ``changes`` holds (emoji, delta) pairs of increased counts. Emojis
+        whose reactors cannot be fetched map to an empty list.
+        """
+        if channel_id in self._unsupported:
+            return {emoji: [] for emoji, _ in changes}
+        self.lookups += len(changes)
+        reactor_ids = await asyncio.gather(*(self._lookup(client, channel_id, message_id, emoji, delta)
+                                             for emoji, delta in changes))
+        users = await self._resolve(client, (user_id for ids in reactor_ids for user_id in ids))
+        return {emoji: [users.get(user_id) or UnresolvedUser(user_id) for user_id in ids]
+                for (emoji, _), ids in zip(changes, reactor_ids)}
+
+    def stats(self) -> Dict[str, int]:
+        """Return attribution counters, including those of the user cache."""
+        return {
+            'lookups': self.lookups,
+            'requests': self.requests,
+            'resolves': self.resolves,
+            'failures': self.failures,
+            'unsupported_channels': len(self._unsupported),
+            **{f"user_cache_{key}": value for key, value in self.user_cache.stats().items()},
+        }
@@ -0,0 +1,139 @@
+import asyncio
+import logging
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, Iterable, List, NamedTuple, Optional, Set
+
+from src.rate_limiter import RateLimiter, method_key
+from src.reaction_state import ReactionStateStore, reaction_counts
+
+if TYPE_CHECKING:
+    from telethon.tl.types import UpdateMessageReactions
+
+
+class ReplayedUpdate(NamedTuple):
+    """A reaction update fetched by the catch-up, with the counts stored for its message before the fetch."""
+    update: 'UpdateMessageReactions'
+    previous: Dict[str, int]
+
+
+class ReactionCatchUp:
+    """Replay reactions that arrived while the bot was down.
+
+    At startup the latest ``max_messages`` messages of each channel are
+    scanned with ``messages.getMessagesReactions``, ``batch_size`` IDs per
+    request and at most ``concurrency`` requests in flight. The counts of
+    messages whose previous state is known are passed to ``process`` as a
+    :class:`ReplayedUpdate`, to be processed like a live update so only real
+    changes are recorded and notified. Messages the
+    state store has forgotten, or that predate the tracking of their channel,
+    are seeded silently: their reactions may already have been reported, or
+    may be older than the bot. A channel scanned for the first time starts
+    being tracked from its latest message.
+    """
+
+    def __init__(self, client: Any, state_store: ReactionStateStore,
+                 process: Callable[[ReplayedUpdate], Awaitable[None]],
+                 rate_limiter: Optional[RateLimiter] = None, max_messages: int = 500,
+                 batch_size: int = 100, concurrency: int = 4) -> None:
+        self.client = client
+        self.state_store = state_store
+        self.process = process
+        self.rate_limiter = rate_limiter if rate_limiter is not None else RateLimiter.unlimited()
+        self.max_messages = max_messages
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.requests = 0
+        self.replayed = 0
+        self.seeded = 0
+        self.failed_batches = 0
+
+    @classmethod
+    def from_config(cls, client: Any, state_store: ReactionStateStore,
+                    process: Callable[[ReplayedUpdate], Awaitable[None]],
+                    settings: Dict[str, Any], rate_limiter: Optional[RateLimiter] = None) -> 'ReactionCatchUp':
+        """Build a catch-up stage from the ``catch_up`` config section."""
+        return cls(client, state_store, process, rate_limiter,
+                   max_messages=settings.get('max_messages', 500),
+                   batch_size=settings.get('batch_size', 100),
+                   concurrency=settings.get('concurrency', 4))
+
+    async def _latest_message_id(self, channel_id: int) -> int:
+        from telethon.tl.types import PeerChannel
+        messages = await self.rate_limiter.call(
+            method_key('GetHistoryRequest'), lambda: self.client.get_messages(PeerChannel(channel_id), limit=1))
+        return messages[0].id if messages else 0
+
+    async def _fetch(self, channel_id: int, message_ids: List[int]) -> List['UpdateMessageReactions']:
+        from telethon.tl.functions.messages import GetMessagesReactionsRequest
+        from telethon.tl.types import PeerChannel, UpdateMessageReactions
+        self.requests += 1
+        result = await self.rate_limiter.call(
+            method_key('GetMessagesReactionsRequest'),
+            lambda: self.client(GetMessagesReactionsRequest(peer=PeerChannel(channel_id), id=message_ids)))
+        return [update for update in getattr(result, 'updates', ())
+                if isinstance(update, UpdateMessageReactions)]
+
+    async def _catch_up_batch(self, semaphore: asyncio.Semaphore, channel_id: int, message_ids: List[int],
+                              known: Set[int]) -> None:
+        async with semaphore:
+            # Taken before the request, so a live update processed since then can be told apart
+            previous = {message_id: self.state_store.get(channel_id, message_id)
+                        for message_id in message_ids if message_id in known}
+            try:
+                updates = await self._fetch(channel_id, message_ids)
+            except Exception as e:
+                self.failed_batches += 1
+                logging.error(f"Failed to fetch reactions of {len(message_ids)} messages in channel {channel_id}: {e}")
+                return
+        for update in updates:
+            if update.msg_id in previous:
+                self.replayed += 1
+                await self.process(ReplayedUpdate(update, previous[update.msg_id]))
+            elif self.state_store.is_known(channel_id, update.msg_id):
+                pass  # A live update stored counts at least as new while the batch was in flight
+            else:
+                self.seeded += 1
+                self.state_store.diff(channel_id, update.msg_id, reaction_counts(update.reactions.results))
+
+    async def _catch_up_channel(self, semaphore: asyncio.Semaphore, channel_id: int) -> None:
+        try:
+            async with semaphore:
+                latest = await self._latest_message_id(channel_id)
+        except Exception as e:
+            logging.error(f"Failed to find the latest message of channel {channel_id}: {e}")
+            return
+        self.state_store.track(channel_id, latest)
+        first = max(1, latest - self.max_messages + 1)
+        # Decided up front: seeding the first batch must not make the rest of the channel look tracked
+        known = {message_id for message_id in range(first, latest + 1)
+                 if self.state_store.is_known(channel_id, message_id)}
+        await asyncio.gather(*(
+            self._catch_up_batch(semaphore, channel_id,
+                                 list(range(start, min(start + self.batch_size, latest + 1))), known)
+            for start in range(first, latest + 1, self.batch_size)
+        ))
+
+    async def track(self, channel_id: int) -> bool:
+        """Start tracking a channel from its latest message; return False if it could not be found."""
+        try:
+            self.state_store.track(channel_id, await self._latest_message_id(channel_id))
+        except Exception as e:
+            logging.error(f"Failed to find the latest message of channel {channel_id}: {e}")
+            return False
+        return True
+
+    async def run(self, channel_ids: Iterable[int]) -> Dict[str, int]:
+        """Scan the recent messages of ``channel_ids`` and return the counters."""
+        semaphore = asyncio.Semaphore(self.concurrency)
+        await asyncio.gather(*(self._catch_up_channel(semaphore, channel_id) for channel_id in channel_ids))
+        stats = self.stats()
+        logging.info(f"Caught up on {stats['replayed']} message(s) and seeded {stats['seeded']} "
+                     f"with {stats['requests']} request(s)")
+        return stats
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'requests': self.requests,
+            'replayed': self.replayed,
+            'seeded': self.seeded,
+            'failed_batches': self.failed_batches,
+        }
@@ -0,0 +1,164 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Set, Tuple
+
+OVERFLOW_POLICIES = ('drop_oldest', 'drop_newest')
+
+
+class UpdateDispatcher:
+    """Routes updates into per-channel queues served by a fixed pool of workers.
+
+    Updates of one channel are processed one at a time and in order, while
+    different channels are processed in parallel. At most one worker holds
+    a channel at any time, and it hands the channel back after
+    ``batch_size`` updates so a busy channel cannot starve the others.
+
+    When a channel queue or the dispatcher as a whole is full, the overflow
+    policy decides what is lost: ``drop_oldest`` discards the oldest pending
+    update of that channel, ``drop_newest`` rejects the incoming one.
+    """
+
+    def __init__(self, process: Callable[[Any], Awaitable[None]], workers: int = 8, max_per_channel: int = 100,
+                 max_total: int = 10000, overflow_policy: str = 'drop_oldest', batch_size: int = 10,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy {overflow_policy!r}, expected one of {OVERFLOW_POLICIES}")
+        self._process = process
+        self.workers = workers
+        self.max_per_channel = max_per_channel
+        self.max_total = max_total
+        self.overflow_policy = overflow_policy
+        self.batch_size = batch_size
+        self._clock = clock
+        self._channels: Dict[int, Deque[Tuple[float, Any]]] = {}
+        self._scheduled: Set[int] = set()
+        self._ready: 'asyncio.Queue[int]' = asyncio.Queue()
+        self._tasks: List[asyncio.Task] = []
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._active = 0
+        self.pending = 0
+        self.accepted = 0
+        self.processed = 0
+        self.dropped = 0
+        self.failed = 0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+
+    @classmethod
+    def from_config(cls, process: Callable[[Any], Awaitable[None]], settings: Dict[str, Any]) -> 'UpdateDispatcher':
+        """Build a dispatcher from the ``dispatcher`` config section."""
+        return cls(process,
+                   workers=settings.get('workers', 8),
+                   max_per_channel=settings.get('max_per_channel', 100),
+                   max_total=settings.get('max_total', 10000),
+                   overflow_policy=settings.get('overflow_policy', 'drop_oldest'),
+                   batch_size=settings.get('batch_size', 10))
+
+    def submit(self, channel_id: int, update: Any) -> bool:
+        """Queue an update without blocking; return False if it was rejected."""
+        queue = self._channels.get(channel_id)
+        if queue is None:
+            queue = self._channels[channel_id] = deque()
+
+        if len(queue) >= self.max_per_channel or self.pending >= self.max_total:
+            self.dropped += 1
+            if self.overflow_policy == 'drop_newest' or not queue:
+                if not queue and channel_id not in self._scheduled:
+                    del self._channels[channel_id]
+                return False
+            queue.popleft()
+            self.pending -= 1
+
+        queue.append((self._clock(), update))
+        self.pending += 1
+        self.accepted += 1
+        self._idle.clear()
+        if channel_id not in self._scheduled:
+            self._scheduled.add(channel_id)
+            self._ready.put_nowait(channel_id)
+        return True
+
+    def start(self) -> None:
+        """Start the worker tasks."""
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def close(self, drain: bool = True) -> None:
+        """Stop the workers, first waiting for queued updates to be processed if ``drain`` is set."""
+        if drain and self._tasks:
+            await self._idle.wait()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _worker(self) -> None:
+        while True:
+            channel_id = await self._ready.get()
+            queue = self._channels[channel_id]
+            self._active += 1
+            try:
+                for _ in range(self.batch_size):
+                    if not queue:
+                        break
+                    enqueued_at, update = queue.popleft()
+                    self.pending -= 1
+                    lag = self._clock() - enqueued_at
+                    self.last_lag = lag
+                    self.max_lag = max(self.max_lag, lag)
+                    try:
+                        await self._process(update)
+                    except Exception as e:
+                        self.failed += 1
+                        logging.error("Failed to process update for channel %s: %s", channel_id, e,
+                                      extra={'category': 'dispatch', 'channel_id': channel_id})
+                    self.processed += 1
+            finally:
+                self._active -= 1
+                if queue:
+                    self._ready.put_nowait(channel_id)  # Back of the line, behind other channels
+                else:
+                    self._scheduled.discard(channel_id)
+                    del self._channels[channel_id]
+                if self.pending == 0 and self._active == 0:
+                    self._idle.set()
+
+    def channel_lag(self, channel_id: int) -> float:
+        """Return how long the oldest pending update of a channel has been waiting."""
+        queue = self._channels.get(channel_id)
+        if not queue:
+            return 0.0
+        return self._clock() - queue[0][0]
+
+    def channel_stats(self) -> Dict[int, Dict[str, float]]:
+        """Return the queue depth and lag of every channel with pending updates.
+
+        Metrics scrapes call this from another thread while the workers change
+        the queues, so the channels are copied first and a queue that empties
+        mid-read counts as having no lag.
+        """
+        now = self._clock()
+        stats = {}
+        for channel_id, queue in list(self._channels.items()):
+            try:
+                oldest = queue[0][0]
+            except IndexError:
+                oldest = now
+            stats[channel_id] = {'pending': len(queue), 'lag': now - oldest}
+        return stats
+
+    def stats(self) -> Dict[str, float]:
+        """Return dispatcher counters and lag."""
+        return {
+            'channels': len(self._channels),
+            'pending': self.pending,
+            'accepted': self.accepted,
+            'processed': self.processed,
+            'dropped': self.dropped,
+            'failed': self.failed,
+            'last_lag': self.last_lag,
+            'max_lag': self.max_lag,
+        }
@@ -0,0 +1,288 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+HOUR = 3600
+MAX_RETRY_DELAY = 5.0
+CLOSE_ATTEMPTS = 3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS reaction_events (
+    ts REAL NOT NULL,
+    channel_id INTEGER NOT NULL,
+    message_id INTEGER NOT NULL,
+    emoji TEXT NOT NULL,
+    delta INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_reaction_events_message ON reaction_events (channel_id, message_id, ts);
+CREATE INDEX IF NOT EXISTS idx_reaction_events_ts ON reaction_events (ts);
+CREATE TABLE IF NOT EXISTS reaction_hourly (
+    channel_id INTEGER NOT NULL,
+    message_id INTEGER NOT NULL,
+    hour INTEGER NOT NULL,
+    emoji TEXT NOT NULL,
+    total INTEGER NOT NULL,
+    PRIMARY KEY (channel_id, message_id, hour, emoji)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_reaction_hourly_hour ON reaction_hourly (hour);
+"""
+
+Event = Tuple[float, int, int, str, int]
+
+
+class ReactionEventStore:
+    """Append-only SQLite store of reaction deltas with hourly compaction.
+
+    ``append`` only adds a tuple to an in-memory buffer, so it is safe to call
+    from the event loop. A writer thread inserts the buffer in batches, in WAL
+    mode, and periodically folds raw events older than ``raw_retention``
+    seconds into per-hour aggregates. A write that fails because the database
+    is busy is put back in the buffer and retried with backoff. Queries read
+    both tables through their own connection and may run on any thread.
+    """
+
+    def __init__(self, path: str, batch_size: int = 1000, flush_interval: float = 0.5,
+                 max_buffer: int = 100000, raw_retention: float = 2 * HOUR, compact_interval: float = 600,
+                 busy_timeout: float = 5.0) -> None:
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self.raw_retention = raw_retention
+        self.compact_interval = compact_interval
+        self.busy_timeout = busy_timeout
+        self._buffer: Deque[Event] = deque()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.appended = 0
+        self.written = 0
+        self.dropped = 0
+        self.compacted = 0
+        self.write_errors = 0
+
+    @classmethod
+    def from_config(cls, settings: Dict[str, Any]) -> 'ReactionEventStore':
+        """Build a store from the ``event_store`` config section."""
+        return cls(settings.get('path', 'data/reactions.db'),
+                   batch_size=settings.get('batch_size', 1000),
+                   flush_interval=settings.get('flush_interval', 0.5),
+                   max_buffer=settings.get('max_buffer', 100000),
+                   raw_retention=settings.get('raw_retention', 2 * HOUR),
+                   compact_interval=settings.get('compact_interval', 600),
+                   busy_timeout=settings.get('busy_timeout', 5.0))
+
+    def _connect(self) -> sqlite3.Connection:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        connection = sqlite3.connect(self.path, timeout=self.busy_timeout)
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=NORMAL')
+        connection.executescript(SCHEMA)
+        return connection
+
+    # Writing
+
+    def start(self) -> None:
+        """Start the writer thread."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name='reaction-event-store', daemon=True)
+        self._thread.start()
+
+    def close(self) -> None:
+        """Write everything buffered so far and stop the writer thread."""
+        if self._thread is None:
+            return
+        self._stopping.set()
+        self._wakeup.set()
+        self._thread.join()
+        self._thread = None
+
+    def append(self, channel_id: int, message_id: int, emoji: str, delta: int, ts: Optional[float] = None) -> bool:
+        """Buffer one reaction delta; return False if the buffer is full and the event was dropped."""
+        if len(self._buffer) >= self.max_buffer:
+            self.dropped += 1
+            return False
+        self._buffer.append((time.time() if ts is None else ts, channel_id, message_id, emoji, delta))
+        self.appended += 1
+        if len(self._buffer) >= self.batch_size:
+            self._wakeup.set()
+        return True
+
+    def _run(self) -> None:
+        connection = self._connect()
+        next_compaction = time.monotonic() + self.compact_interval
+        failures = 0
+        try:
+            while True:
+                self._wakeup.wait(self.flush_interval)
+                self._wakeup.clear()
+                stopping = self._stopping.is_set()
+                try:
+                    self._write_buffer(connection)
+                    if time.monotonic() >= next_compaction:
+                        self._compact(connection, time.time() - self.raw_retention)
+                        next_compaction = time.monotonic() + self.compact_interval
+                except sqlite3.OperationalError as e:
+                    # Usually another connection holding the database longer than busy_timeout
+                    self.write_errors += 1
+                    failures += 1
+                    if stopping and failures >= CLOSE_ATTEMPTS:
+                        logging.error(f"Reaction event store closed with {len(self._buffer)} events unwritten: {e}")
+                        break
+                    delay = min(self.flush_interval * 2 ** failures, MAX_RETRY_DELAY)
+                    logging.warning(f"Reaction event store write failed, retrying in {delay:.1f}s: {e}")
+                    if stopping:
+                        time.sleep(delay)
+                    else:
+                        self._stopping.wait(delay)
+                    continue
+                failures = 0
+                if stopping:
+                    break  # Everything appended before close() was called is written
+        except Exception as e:
+            logging.error(f"Reaction event store writer stopped: {e}")
+        finally:
+            connection.close()
+
+    def _write_buffer(self, connection: sqlite3.Connection) -> None:
+        while self._buffer:
+            batch = []
+            while self._buffer and len(batch) < self.batch_size:
+                batch.append(self._buffer.popleft())
+            try:
+                with connection:
+                    connection.executemany(
+                        'INSERT INTO reaction_events (ts, channel_id, message_id, emoji, delta) VALUES (?, ?, ?, ?, ?)',
+                        batch)
+            except sqlite3.OperationalError:
+                self._buffer.extendleft(reversed(batch))  # Retried first, in the original order
+                raise
+            self.written += len(batch)
+
+    def _compact(self, connection: sqlite3.Connection, before: float) -> int:
+        # Only whole hours are folded, so an hour is never split between the two tables
+        cutoff = int(before // HOUR) * HOUR
+        with connection:
+            connection.execute(
+                'INSERT INTO reaction_hourly (channel_id, message_id, hour, emoji, total) '
+                'SELECT channel_id, message_id, CAST(ts / ? AS INTEGER) * ?, emoji, SUM(delta) '
+                'FROM reaction_events WHERE ts < ? GROUP BY 1, 2, 3, 4 '
+                'ON CONFLICT (channel_id, message_id, hour, emoji) DO UPDATE SET total = total + excluded.total',
+                (HOUR, HOUR, cutoff))
+            removed = connection.execute('DELETE FROM reaction_events WHERE ts < ?', (cutoff,)).rowcount
+        self.compacted += removed
+        return removed
+
+    def compact(self, before: Optional[float] = None) -> int:
+        """Fold raw events from whole hours before ``before`` into hourly aggregates."""
+        connection = self._connect()
+        try:
+            return self._compact(connection, time.time() - self.raw_retention if before is None else before)
+        finally:
+            connection.close()
+
+    # Querying
+
+    def _query(self, sql: str, params: Tuple[Any, ...]) -> List[sqlite3.Row]:
+        if not os.path.exists(self.path):
+            return []
+        connection = sqlite3.connect(self.path, timeout=self.busy_timeout)
+        connection.execute('PRAGMA query_only=ON')
+        connection.row_factory = sqlite3.Row
+        try:
+            return connection.execute(sql, params).fetchall()
+        finally:
+            connection.close()
+
+    def top_messages(self, since: float, limit: Optional[int] = 10,
+                     channel_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Return the messages with the largest net reaction change since ``since``, all of them if ``limit`` is None.
+
+        Compacted data has hour granularity, so the hour containing ``since``
+        is counted in full.
+        """
+        channel_filter = ' AND channel_id = ?' if channel_id is not None else ''
+        channel_params: Tuple[Any, ...] = (channel_id,) if channel_id is not None else ()
+        rows = self._query(
+            'SELECT channel_id, message_id, SUM(delta) AS total FROM ('
+            f'SELECT channel_id, message_id, delta FROM reaction_events WHERE ts >= ?{channel_filter} '
+            'UNION ALL '
+            f'SELECT channel_id, message_id, total FROM reaction_hourly WHERE hour >= ?{channel_filter}'
+            ') GROUP BY channel_id, message_id ORDER BY total DESC LIMIT ?',
+            (since, *channel_params, int(since // HOUR) * HOUR, *channel_params, -1 if limit is None else limit))
+        return [dict(row) for row in rows]
+
+    def time_series(self, channel_id: int, since: float, until: Optional[float] = None,
+                    message_id: Optional[int] = None, bucket: int = HOUR) -> List[Dict[str, Any]]:
+        """Return the net reaction change per time bucket and emoji for a channel or message.
+
+        ``bucket`` must be a multiple of an hour to line up with compacted data.
+        """
+        if bucket <= 0 or bucket % HOUR:
+            raise ValueError("bucket must be a positive multiple of 3600 seconds")
+        until = time.time() if until is None else until
+        message_filter = ' AND message_id = ?' if message_id is not None else ''
+        message_params: Tuple[Any, ...] = (message_id,) if message_id is not None else ()
+        rows = self._query(
+            'SELECT CAST(ts / ? AS INTEGER) * ? AS bucket, emoji, SUM(delta) AS total FROM ('
+            f'SELECT ts, emoji, delta FROM reaction_events WHERE channel_id = ?{message_filter} AND ts >= ? AND ts < ? '
+            'UNION ALL '
+            f'SELECT hour, emoji, total FROM reaction_hourly WHERE channel_id = ?{message_filter} '
+            'AND hour >= ? AND hour < ?'
+            ') GROUP BY 1, 2 ORDER BY 1, 2',
+            (bucket, bucket,
+             channel_id, *message_params, since, until,
+             channel_id, *message_params, int(since // HOUR) * HOUR, until))
+        return [dict(row) for row in rows]
+
+    def stats(self) -> Dict[str, int]:
+        """Return ingestion counters."""
+        return {
+            'buffered': len(self._buffer),
+            'appended': self.appended,
+            'written': self.written,
+            'dropped': self.dropped,
+            'compacted': self.compacted,
+            'write_errors': self.write_errors,
+        }
+
+
+class MergedEventStore:
+    """Read-only view answering the queries of several event stores as one, such as those of the shards.
+
+    A channel that moved between shards has events in more than one
+    database, so totals are summed across all of them before ranking.
+    """
+
+    def __init__(self, stores: List[ReactionEventStore]) -> None:
+        self.stores = stores
+
+    def top_messages(self, since: float, limit: Optional[int] = 10,
+                     channel_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Return the messages with the largest net reaction change since ``since``, across every store."""
+        totals: Dict[Tuple[int, int], int] = {}
+        for store in self.stores:
+            for row in store.top_messages(since, None, channel_id):
+                key = (row['channel_id'], row['message_id'])
+                totals[key] = totals.get(key, 0) + row['total']
+        ranked = sorted(totals.items(), key=lambda item: item[1], reverse=True)[:limit]
+        return [{'channel_id': key[0], 'message_id': key[1], 'total': total} for key, total in ranked]
+
+    def time_series(self, channel_id: int, since: float, until: Optional[float] = None,
+                    message_id: Optional[int] = None, bucket: int = HOUR) -> List[Dict[str, Any]]:
+        """Return the net reaction change per time bucket and emoji, across every store."""
+        until = time.time() if until is None else until
+        totals: Dict[Tuple[int, str], int] = {}
+        for store in self.stores:
+            for row in store.time_series(channel_id, since, until, message_id, bucket):
+                key = (row['bucket'], row['emoji'])
+                totals[key] = totals.get(key, 0) + row['total']
+        return [{'bucket': key[0], 'emoji': key[1], 'total': total} for key, total in sorted(totals.items())]
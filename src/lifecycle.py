@@ -0,0 +1,204 @@
+import asyncio
+import concurrent.futures
+import logging
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Callable, Coroutine, Dict, Optional, Tuple
+
+from src.settings import DEFAULT_CONFIG_PATH
+
+if TYPE_CHECKING:
+    from src.telegram_bot import ReactionBot
+
+# The bot module, and Telethon with it, is imported on the first start, so the API comes up without it
+
+
+def default_config_loader(config_path: str) -> Dict[str, Any]:
+    from src.telegram_bot import load_config
+    return load_config(config_path)
+
+
+def default_client_factory(config: Dict[str, Any]) -> Any:
+    from src.telegram_bot import create_telegram_client
+    return create_telegram_client(config['telegram']['session_name'],
+                                  config['telegram']['api_id'],
+                                  config['telegram']['api_hash'])
+
+
+class BotLifecycle:
+    """Run the bot on one long-lived event loop thread and control it from any thread.
+
+    :meth:`start`, :meth:`stop` and :meth:`reload` schedule the work on the
+    loop with ``asyncio.run_coroutine_threadsafe`` and return a
+    ``concurrent.futures.Future``; they are serialized, so overlapping calls
+    cannot start two bots. Stopping drains queued updates and notifications
+    while the client is still connected, and only then disconnects. The
+    client is kept, so the next start reconnects with the same session
+    instead of building a new client, loop and thread.
+    """
+
+    def __init__(self, config_path: str = DEFAULT_CONFIG_PATH,
+                 config_loader: Callable[[str], Dict[str, Any]] = default_config_loader,
+                 client_factory: Callable[[Dict[str, Any]], Any] = default_client_factory) -> None:
+        self.config_path = config_path
+        self._load_config = config_loader
+        self._client_factory = client_factory
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._thread_lock = threading.Lock()
+        self._lock: Optional[asyncio.Lock] = None
+        self._watch_task: Optional[asyncio.Task] = None
+        self._client_key: Optional[Tuple[Any, ...]] = None
+        self.client: Any = None
+        self.bot: Optional['ReactionBot'] = None
+        self.config: Optional[Dict[str, Any]] = None
+        # One of stopped, starting, running, stopping; only changed on the loop thread
+        self.state = 'stopped'
+        self.started_at: Optional[float] = None
+        self.starts = 0
+        self.last_error: Optional[str] = None
+
+    @property
+    def running(self) -> bool:
+        return self.state == 'running'
+
+    # Thread-safe entry points
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._thread_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._loop.run_forever, name='reaction-bot-loop', daemon=True)
+                self._thread.start()
+            return self._loop
+
+    def _submit(self, coroutine: Coroutine[Any, Any, Any]) -> 'concurrent.futures.Future[Any]':
+        return asyncio.run_coroutine_threadsafe(coroutine, self._ensure_loop())
+
+    def start(self) -> 'concurrent.futures.Future[bool]':
+        """Start the bot; the future resolves to False if it was already running."""
+        return self._submit(self._locked(self._start))
+
+    def stop(self) -> 'concurrent.futures.Future[bool]':
+        """Drain and stop the bot, then disconnect; the future resolves to False if it was not running."""
+        return self._submit(self._locked(self._stop))
+
+    def reload(self) -> 'concurrent.futures.Future[bool]':
+        """Re-read the config file and restart the bot with it, keeping the client if its session is unchanged."""
+        return self._submit(self._locked(self._reload))
+
+    def shutdown(self, timeout: float = 30) -> None:
+        """Stop the bot and the loop thread; meant for process exit."""
+        with self._thread_lock:
+            loop, thread = self._loop, self._thread
+        if loop is None or thread is None or not thread.is_alive():
+            return
+        try:
+            self.stop().result(timeout)
+        except Exception as e:
+            logging.error(f"Failed to stop the bot cleanly: {e}")
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout)
+        if not thread.is_alive():
+            loop.close()
+        if self.starts:
+            from src.telegram_bot import shutdown_logging
+            shutdown_logging()
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            'state': self.state,
+            'bot_running': self.running,
+            'uptime': time.time() - self.started_at if self.running and self.started_at else 0.0,
+            'starts': self.starts,
+            'last_error': self.last_error,
+        }
+
+    # Loop-side implementation
+
+    async def _locked(self, operation: Callable[[], Coroutine[Any, Any, bool]]) -> bool:
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            return await operation()
+
+    async def _connect(self, config: Dict[str, Any]) -> Any:
+        """Return a started client for ``config``, reusing the current one if its session is unchanged."""
+        telegram = config['telegram']
+        key = (telegram['session_name'], telegram['api_id'], telegram['api_hash'])
+        if self.client is not None and key != self._client_key:
+            await self.client.disconnect()
+            await self._unwatch()
+            self.client = None
+        if self.client is None:
+            self.client = self._client_factory(config)
+            self._client_key = key
+        # On a warm client this only reconnects; the session is already authorized
+        await self.client.start()
+        if self._watch_task is None:
+            self._watch_task = asyncio.create_task(self._watch(self.client))
+        return self.client
+
+    async def _watch(self, client: Any) -> None:
+        """Stop the bot if the client disconnects without being asked to."""
+        await client.run_until_disconnected()
+        if client is self.client and self.state == 'running':
+            self._watch_task = None
+            logging.warning("Telegram client disconnected; stopping the bot")
+            await self._locked(self._stop)
+
+    async def _unwatch(self) -> None:
+        if self._watch_task is not None:
+            await asyncio.gather(self._watch_task, return_exceptions=True)
+            self._watch_task = None
+
+    async def _start(self) -> bool:
+        if self.state == 'running':
+            return False
+        self.state = 'starting'
+        client = bot = None
+        try:
+            from src.telegram_bot import ReactionBot, setup_logging
+            config = await asyncio.to_thread(self._load_config, self.config_path)
+            setup_logging(config['logging']['log_file'], config['logging']['level'],
+                          config['logging'].get('format', 'text'), config['logging'].get('sampling'))
+            client = await self._connect(config)
+            bot = ReactionBot(client, config, self.config_path)
+            await bot.start()
+        except Exception as e:
+            if bot is not None:
+                client.remove_event_handler(bot.handle_update)
+            self.state = 'stopped'
+            self.last_error = str(e)
+            logging.error(f"Failed to start bot: {e}")
+            raise
+        self.config, self.bot = config, bot
+        self.state = 'running'
+        self.started_at = time.time()
+        self.starts += 1
+        self.last_error = None
+        logging.info("Bot started successfully.")
+        return True
+
+    async def _stop(self, disconnect: bool = True) -> bool:
+        if self.state != 'running':
+            return False
+        self.state = 'stopping'
+        try:
+            # Drain while still connected, so queued notifications can be sent
+            await self.bot.stop()
+        finally:
+            self.bot = None
+            if disconnect and self.client is not None:
+                await self.client.disconnect()
+                await self._unwatch()
+            self.state = 'stopped'
+        logging.info("Bot stopped successfully.")
+        return True
+
+    async def _reload(self) -> bool:
+        if self.state != 'running':
+            # Nothing to restart; the next start reads the file anyway
+            return False
+        await self._stop(disconnect=False)
+        return await self._start()
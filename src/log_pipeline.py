@@ -0,0 +1,69 @@
+import json
+import logging
+import threading
+import time
+from typing import Dict
+
+from src.rate_limiter import TokenBucket
+
+# Record attributes copied into JSON lines when a log call passes them through ``extra``
+STRUCTURED_FIELDS = ('category', 'channel_id', 'message_id', 'chat_id', 'emoji', 'delta', 'count', 'latency')
+
+
+class JsonFormatter(logging.Formatter):
+    """Format records as one JSON object per line, including structured fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': self.formatTime(record, self.datefmt),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for field in STRUCTURED_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """Cap the rate of log records per category.
+
+    Records carrying ``extra={'category': ...}`` for a category listed in
+    ``rates`` are limited to that many records per second (with a burst of
+    the same size). Dropped records are counted, and the count is appended
+    to the next record of the category that gets through. Records without
+    a capped category always pass.
+    """
+
+    def __init__(self, rates: Dict[str, float], clock=time.monotonic) -> None:
+        super().__init__()
+        self._clock = clock
+        now = clock()
+        self._buckets = {category: TokenBucket(rate, rate, now) for category, rate in rates.items() if rate > 0}
+        self._suppressed: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.dropped = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        category = getattr(record, 'category', None)
+        bucket = self._buckets.get(category)
+        if bucket is None:
+            return True
+        with self._lock:
+            now = self._clock()
+            if bucket.wait_time(now) > 0:
+                self._suppressed[category] = self._suppressed.get(category, 0) + 1
+                self.dropped += 1
+                return False
+            bucket.take(now)
+            suppressed = self._suppressed.pop(category, 0)
+        if suppressed:
+            record.msg = f"{record.getMessage()} ({suppressed} similar {category} records suppressed)"
+            record.args = None
+        return True
@@ -0,0 +1,193 @@
+import bisect
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+LabelKey = Tuple[Tuple[str, str], ...]
+Sample = Tuple[Dict[str, object], float]
+CallbackResult = Union[float, Iterable[Sample]]
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _label_key(labels: Dict[str, object]) -> LabelKey:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _format_labels(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(key) + ([extra] if extra else [])
+    if not pairs:
+        return ''
+    escaped = (value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Counter:
+    """Monotonically increasing value, optionally split by labels."""
+
+    type_name = 'counter'
+
+    def __init__(self, name: str, documentation: str) -> None:
+        self.name = name
+        self.documentation = documentation
+        self._values: Dict[LabelKey, float] = {}
+
+    def inc(self, amount: float = 1, **labels: object) -> None:
+        key = _label_key(labels) if labels else ()
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: object) -> float:
+        return self._values.get(_label_key(labels), 0)
+
+    def collect(self) -> List[str]:
+        return [f"{self.name}{_format_labels(key)} {_format_value(value)}"
+                for key, value in list(self._values.items())]
+
+
+class Gauge(Counter):
+    """Value that can go up and down."""
+
+    type_name = 'gauge'
+
+    def set(self, value: float, **labels: object) -> None:
+        self._values[_label_key(labels) if labels else ()] = value
+
+    def dec(self, amount: float = 1, **labels: object) -> None:
+        self.inc(-amount, **labels)
+
+
+class Histogram:
+    """Distribution of observed values in cumulative buckets."""
+
+    type_name = 'histogram'
+
+    def __init__(self, name: str, documentation: str, buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self._counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    @contextmanager
+    def time(self) -> Iterator[None]:
+        """Observe the duration of the ``with`` block."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started)
+
+    def collect(self) -> List[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (math.inf,), self._counts):
+            cumulative += count
+            lines.append(f"{self.name}_bucket{_format_labels((), ('le', _format_value(bound)))} {cumulative}")
+        lines.append(f"{self.name}_sum {_format_value(self.sum)}")
+        lines.append(f"{self.name}_count {self.count}")
+        return lines
+
+
+class CallbackMetric:
+    """Metric whose samples are read from a callback at scrape time only."""
+
+    def __init__(self, name: str, documentation: str, callback: Callable[[], CallbackResult],
+                 type_name: str = 'gauge') -> None:
+        self.name = name
+        self.documentation = documentation
+        self.callback = callback
+        self.type_name = type_name
+
+    def collect(self) -> List[str]:
+        result = self.callback()
+        if isinstance(result, (int, float)):
+            samples: Iterable[Sample] = [({}, result)]
+        else:
+            samples = result
+        return [f"{self.name}{_format_labels(_label_key(labels))} {_format_value(value)}"
+                for labels, value in samples]
+
+
+Metric = Union[Counter, Gauge, Histogram, CallbackMetric]
+
+
+class Registry:
+    """Collection of metrics rendered in the Prometheus text exposition format.
+
+    Hot-path metrics only update plain Python numbers; all formatting, and
+    every callback, happens when :meth:`render` is called by a scrape.
+    """
+
+    def __init__(self) -> None:
+        self._metrics: Dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: Metric) -> Metric:
+        """Add a metric, replacing any metric registered under the same name."""
+        with self._lock:
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str) -> Counter:
+        return self.register(Counter(name, documentation))
+
+    def gauge(self, name: str, documentation: str) -> Gauge:
+        return self.register(Gauge(name, documentation))
+
+    def histogram(self, name: str, documentation: str, buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, buckets))
+
+    def callback(self, name: str, documentation: str, callback: Callable[[], CallbackResult],
+                 type_name: str = 'gauge') -> CallbackMetric:
+        """Register a metric whose value is computed by ``callback`` on each scrape."""
+        return self.register(CallbackMetric(name, documentation, callback, type_name))
+
+    def unregister(self, name: str) -> None:
+        with self._lock:
+            self._metrics.pop(name, None)
+
+    def render(self) -> str:
+        """Return all metrics in the Prometheus text exposition format."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type_name}")
+            lines.extend(metric.collect())
+        return '\n'.join(lines) + '\n'
+
+
+# Content type of the text exposition format served on /metrics
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+REGISTRY = Registry()
+
+REACTIONS_PROCESSED = REGISTRY.counter(
+    'reaction_bot_reactions_processed_total', 'Reaction count increases found in updates.')
+MESSAGES_SENT = REGISTRY.counter(
+    'reaction_bot_messages_sent_total', 'Messages delivered to Telegram.')
+MESSAGES_FAILED = REGISTRY.counter(
+    'reaction_bot_messages_failed_total', 'Messages given up on after all retry attempts.')
+PROCESS_REACTIONS_SECONDS = REGISTRY.histogram(
+    'reaction_bot_process_reactions_seconds', 'Time spent processing one reaction update.')
+SEND_MESSAGE_SECONDS = REGISTRY.histogram(
+    'reaction_bot_send_message_seconds', 'Time spent on one send_message call.')
+EVENT_LOOP_LAG_SECONDS = REGISTRY.histogram(
+    'reaction_bot_event_loop_lag_seconds', 'How late the event loop woke up a sleeping task.')
@@ -0,0 +1,232 @@
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+# Telegram rejects messages longer than this many characters
+MAX_MESSAGE_LENGTH = 4096
+
+
+class ReactionNotice(NamedTuple):
+    """A reaction count change to report to the owner."""
+    channel_id: int
+    message_id: int
+    emoji: str
+    delta: int
+    count: int
+    users: Tuple[str, ...] = ()
+
+
+class _PendingEmoji:
+    __slots__ = ('delta', 'count', 'users')
+
+    def __init__(self) -> None:
+        self.delta = 0
+        self.count = 0
+        self.users: List[str] = []
+
+
+class NotificationQueue:
+    """Bounded queue that coalesces reaction notices per message before sending.
+
+    Notices are merged per (channel, message) and flushed as one owner
+    message once ``window`` seconds have passed since the first pending
+    notice, or as soon as ``max_batch`` notices are pending. ``submit``
+    blocks while the queue is full, pushing back on the producer.
+
+    With a ``dedup`` table shared between processes (see
+    :class:`src.sharding.NotificationDedup`), each flush first claims the
+    counts it is about to report, so the owner is never told about the same
+    reactions by two shards. Removals are then queued too, to keep the table
+    at the live counts; they are claimed but never sent.
+    """
+
+    def __init__(self, send: Callable[[str], Awaitable[None]], window: float = 2.0, max_batch: int = 100,
+                 max_queue: int = 1000, max_users: int = 5, dedup: Optional[Any] = None) -> None:
+        self._send = send
+        self._dedup = dedup
+        self.window = window
+        self.max_batch = max_batch
+        self.max_users = max_users
+        self._queue: 'asyncio.Queue[Optional[ReactionNotice]]' = asyncio.Queue(maxsize=max_queue)
+        self._pending: 'OrderedDict[Tuple[int, int], Dict[str, _PendingEmoji]]' = OrderedDict()
+        self._pending_notices = 0
+        self._task: Optional[asyncio.Task] = None
+        self.notices = 0
+        self.flushes = 0
+        self.messages_sent = 0
+        self.deduplicated = 0
+        self.last_flush_latency = 0.0
+        self.max_flush_latency = 0.0
+
+    @classmethod
+    def from_config(cls, send: Callable[[str], Awaitable[None]], settings: Dict[str, Any],
+                    dedup: Optional[Any] = None) -> 'NotificationQueue':
+        """Build a queue from the ``notifications`` config section."""
+        return cls(send,
+                   window=settings.get('batch_window', 2.0),
+                   max_batch=settings.get('max_batch', 100),
+                   max_queue=settings.get('max_queue', 1000),
+                   max_users=settings.get('max_users', 5),
+                   dedup=dedup)
+
+    @property
+    def depth(self) -> int:
+        """Number of notices waiting in the queue."""
+        return self._queue.qsize()
+
+    async def reported_counts(self, channel_id: int, message_id: int, emojis: List[str]) -> Dict[str, int]:
+        """Return the counts of ``emojis`` another process already reported for a message.
+
+        Emojis nobody reported are left out, as is everything without a ``dedup`` table.
+        """
+        if self._dedup is None or not emojis:
+            return {}
+        keys = [(channel_id, message_id, emoji) for emoji in emojis]
+        try:
+            counts = await asyncio.to_thread(self._dedup.reported, keys)
+        except Exception as e:
+            logging.error("Failed to look up reported counts: %s", e, extra={'category': 'summary'})
+            return {}
+        return {emoji: count for emoji, count in zip(emojis, counts) if count is not None}
+
+    async def submit(self, notice: ReactionNotice) -> None:
+        """Queue a notice, waiting for room if the queue is full."""
+        if notice.delta < 0 and self._dedup is None:
+            return  # Only the dedup table needs to know about removals
+        await self._queue.put(notice)
+
+    def start(self) -> asyncio.Task:
+        """Start the background task that coalesces and sends notices."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run())
+        return self._task
+
+    async def close(self) -> None:
+        """Flush everything queued so far and stop the background task."""
+        if self._task is None or self._task.done():
+            return
+        await self._queue.put(None)
+        await self._task
+
+    async def run(self) -> None:
+        """Coalesce queued notices and flush them on size or time limits."""
+        loop = asyncio.get_running_loop()
+        closing = False
+        while not closing:
+            notice = await self._queue.get()
+            if notice is None:
+                break
+            started = loop.time()
+            self._add(notice)
+
+            deadline = started + self.window
+            while self._pending_notices < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    notice = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if notice is None:
+                    closing = True
+                    break
+                self._add(notice)
+
+            await self._flush()
+            latency = loop.time() - started
+            self.last_flush_latency = latency
+            self.max_flush_latency = max(self.max_flush_latency, latency)
+
+    def _add(self, notice: ReactionNotice) -> None:
+        self.notices += 1
+        self._pending_notices += 1
+        emojis = self._pending.setdefault((notice.channel_id, notice.message_id), {})
+        pending = emojis.get(notice.emoji)
+        if pending is None:
+            pending = emojis[notice.emoji] = _PendingEmoji()
+        pending.delta += notice.delta
+        pending.count = notice.count
+        for user in notice.users:
+            if user not in pending.users:
+                pending.users.append(user)
+
+    def _format_line(self, channel_id: int, message_id: int, emojis: Dict[str, _PendingEmoji]) -> str:
+        changes = ", ".join(f"{emoji} {pending.delta:+d}" for emoji, pending in emojis.items())
+        line = f"{changes} on msg {message_id} in channel {channel_id}"
+        users = [user for pending in emojis.values() for user in pending.users]
+        if users:
+            shown = ", ".join(users[:self.max_users])
+            more = len(users) - self.max_users
+            line += f" (by {shown}{f' and {more} more' if more > 0 else ''})"
+        return line
+
+    def _format(self) -> List[str]:
+        """Render the pending notices as one or more owner messages."""
+        texts: List[str] = []
+        current = ""
+        for (channel_id, message_id), emojis in self._pending.items():
+            emojis = {emoji: pending for emoji, pending in emojis.items() if pending.delta > 0}
+            if not emojis:
+                continue  # Only removals, or additions cancelled out by them
+            line = self._format_line(channel_id, message_id, emojis)[:MAX_MESSAGE_LENGTH]
+            if current and len(current) + 1 + len(line) > MAX_MESSAGE_LENGTH:
+                texts.append(current)
+                current = ""
+            current = f"{current}\n{line}" if current else line
+        if current:
+            texts.append(current)
+        return texts
+
+    async def _claim(self) -> None:
+        """Drop pending changes another process has already reported, and trim partly reported ones."""
+        keys = [(channel_id, message_id, emoji)
+                for (channel_id, message_id), emojis in self._pending.items() for emoji in emojis]
+        counts = [self._pending[key[:2]][key[2]].count for key in keys]
+        try:
+            # The table lives in another process, so claim the whole batch in one round trip off the loop
+            previous = await asyncio.to_thread(self._dedup.claim, list(zip(keys, counts)))
+        except Exception as e:
+            logging.error("Failed to claim notifications, sending them unchecked: %s", e,
+                          extra={'category': 'summary'})
+            return
+        for (channel_id, message_id, emoji), count, reported in zip(keys, counts, previous):
+            emojis = self._pending[(channel_id, message_id)]
+            if reported is None:
+                if emojis[emoji].delta > 0:
+                    self.deduplicated += 1
+                del emojis[emoji]
+                if not emojis:
+                    del self._pending[(channel_id, message_id)]
+            else:
+                emojis[emoji].delta = min(emojis[emoji].delta, count - reported)
+
+    async def _flush(self) -> None:
+        if self._dedup is not None:
+            await self._claim()
+        texts = self._format()
+        self._pending.clear()
+        self._pending_notices = 0
+        self.flushes += 1
+        for text in texts:
+            logging.info("Sending reaction summary of %d line(s)", text.count('\n') + 1,
+                         extra={'category': 'summary'})
+            logging.debug("Reaction summary: %s", text, extra={'category': 'summary'})
+            try:
+                await self._send(text)
+                self.messages_sent += 1
+            except Exception as e:
+                logging.error("Failed to send reaction summary: %s", e, extra={'category': 'summary'})
+
+    def stats(self) -> Dict[str, float]:
+        """Return queue depth, counters and flush latency."""
+        return {
+            'depth': self.depth,
+            'notices': self.notices,
+            'flushes': self.flushes,
+            'messages_sent': self.messages_sent,
+            'deduplicated': self.deduplicated,
+            'last_flush_latency': self.last_flush_latency,
+            'max_flush_latency': self.max_flush_latency,
+        }
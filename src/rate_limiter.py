@@ -0,0 +1,198 @@
+import asyncio
+import logging
+import random
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple, TypeVar
+
+
+T = TypeVar('T')
+
+
+def _flood_wait_error() -> type:
+    # Only evaluated once a call has failed, so importing the limiter does not import Telethon
+    from telethon.errors import FloodWaitError
+    return FloodWaitError
+
+
+class TokenBucket:
+    """Token bucket refilled at ``rate`` tokens per second up to ``burst`` tokens.
+
+    A rate of zero or less disables the limit.
+    """
+
+    __slots__ = ('rate', 'burst', 'tokens', 'updated', 'paused_until')
+
+    def __init__(self, rate: float, burst: float, now: float) -> None:
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.tokens = self.burst
+        self.updated = now
+        self.paused_until = 0.0
+
+    def _refill(self, now: float) -> None:
+        if self.rate > 0:
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, now: float) -> float:
+        """Return how long to wait before a token can be taken."""
+        wait = max(self.paused_until - now, 0.0)
+        if self.rate <= 0:
+            return wait
+        self._refill(now)
+        if self.tokens < 1:
+            wait = max(wait, (1 - self.tokens) / self.rate)
+        return wait
+
+    def take(self, now: float) -> None:
+        """Take one token; callers check :meth:`wait_time` first."""
+        if self.rate > 0:
+            self._refill(now)
+            self.tokens -= 1
+
+    def pause(self, seconds: float, now: float) -> None:
+        """Stop handing out tokens for ``seconds``."""
+        self.paused_until = max(self.paused_until, now + seconds)
+
+
+def method_key(method: str) -> Tuple[str, str]:
+    """Return the rate limiter key of calls to a Telegram method that are not tied to a chat."""
+    return ('rpc', method)
+
+
+def _is_method_key(key: Hashable) -> bool:
+    return isinstance(key, tuple) and len(key) == 2 and key[0] == 'rpc'
+
+
+class RateLimiter:
+    """Global plus per-chat token buckets for outbound Telethon calls.
+
+    Failed calls are retried with exponential backoff and jitter. A
+    ``FloodWaitError`` pauses only the bucket it concerns for the number of
+    seconds Telegram asked for: the chat's bucket, or for calls not tied to
+    a chat and keyed by :func:`method_key`, the bucket of that method. Method
+    buckets are not rate limited themselves; the global bucket still is.
+    """
+
+    def __init__(self, global_rate: float = 30, global_burst: float = 30, per_chat_rate: float = 1,
+                 per_chat_burst: float = 3, max_chats: int = 10000, max_delay: float = 60,
+                 max_flood_wait: float = 300, clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], Awaitable[Any]] = asyncio.sleep,
+                 jitter: Callable[[], float] = random.random) -> None:
+        self._clock = clock
+        self._sleep = sleep
+        self._jitter = jitter
+        self.per_chat_rate = per_chat_rate
+        self.per_chat_burst = per_chat_burst
+        self.max_chats = max_chats
+        self.max_delay = max_delay
+        self.max_flood_wait = max_flood_wait
+        self._global = TokenBucket(global_rate, global_burst, clock())
+        self._chats: 'OrderedDict[Hashable, TokenBucket]' = OrderedDict()
+        self.calls = 0
+        self.throttled = 0
+        self.retried = 0
+        self.dropped = 0
+        self.flood_waits = 0
+
+    @classmethod
+    def from_config(cls, settings: Dict[str, Any]) -> 'RateLimiter':
+        """Build a limiter from the ``rate_limits`` config section."""
+        return cls(global_rate=settings.get('global_rate', 30),
+                   global_burst=settings.get('global_burst', 30),
+                   per_chat_rate=settings.get('per_chat_rate', 1),
+                   per_chat_burst=settings.get('per_chat_burst', 3),
+                   max_chats=settings.get('max_chats', 10000),
+                   max_delay=settings.get('max_delay', 60),
+                   max_flood_wait=settings.get('max_flood_wait', 300))
+
+    @classmethod
+    def unlimited(cls) -> 'RateLimiter':
+        """Return a limiter that only retries, without throttling."""
+        return cls(global_rate=0, per_chat_rate=0)
+
+    def _bucket(self, chat_id: Optional[Hashable]) -> TokenBucket:
+        if chat_id is None:
+            return self._global
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            if _is_method_key(chat_id):
+                bucket = TokenBucket(0, 1, self._clock())  # Only ever paused by flood waits
+            else:
+                bucket = TokenBucket(self.per_chat_rate, self.per_chat_burst, self._clock())
+            self._chats[chat_id] = bucket
+            while len(self._chats) > self.max_chats:
+                self._chats.popitem(last=False)
+        self._chats.move_to_end(chat_id)
+        return bucket
+
+    async def acquire(self, chat_id: Optional[Hashable] = None) -> None:
+        """Wait until both the global and the chat's bucket allow a call."""
+        chat_bucket = self._bucket(chat_id) if chat_id is not None else None
+        throttled = False
+        while True:
+            now = self._clock()
+            wait = self._global.wait_time(now)
+            if chat_bucket is not None:
+                wait = max(wait, chat_bucket.wait_time(now))
+            if wait <= 0:
+                break
+            if not throttled:
+                throttled = True
+                self.throttled += 1
+            await self._sleep(wait)
+
+        now = self._clock()
+        self._global.take(now)
+        if chat_bucket is not None:
+            chat_bucket.take(now)
+
+    def _backoff(self, attempt: int, base_delay: float) -> float:
+        # Full exponential growth with up to 100% jitter on top, capped
+        delay = base_delay * (2 ** attempt)
+        return min(delay * (1 + self._jitter()), self.max_delay)
+
+    async def call(self, chat_id: Optional[Hashable], func: Callable[[], Awaitable[T]],
+                   attempts: int = 3, base_delay: float = 1) -> T:
+        """Run ``func`` under the rate limits, retrying failures up to ``attempts`` times in total.
+
+        The last error is re-raised once the attempts are used up, or
+        straight away when Telegram asks to wait longer than ``max_flood_wait``.
+        """
+        attempt = 0
+        while True:
+            await self.acquire(chat_id)
+            self.calls += 1
+            try:
+                return await func()
+            except _flood_wait_error() as e:
+                self.flood_waits += 1
+                if e.seconds > self.max_flood_wait:
+                    self.dropped += 1
+                    raise
+                bucket = self._bucket(chat_id)
+                bucket.pause(e.seconds, self._clock())
+                logging.warning("Flood wait of %ss for %s", e.seconds, chat_id, extra={'category': 'rate_limit'})
+                error, delay = e, 0.0  # acquire() waits for the paused bucket
+            except Exception as e:
+                error, delay = e, self._backoff(attempt, base_delay)
+
+            attempt += 1
+            if attempt >= attempts:
+                self.dropped += 1
+                raise error
+            self.retried += 1
+            if delay:
+                await self._sleep(delay)
+
+    def stats(self) -> Dict[str, int]:
+        """Return call counters."""
+        return {
+            'calls': self.calls,
+            'throttled': self.throttled,
+            'retried': self.retried,
+            'dropped': self.dropped,
+            'flood_waits': self.flood_waits,
+            'chats': len(self._chats),
+        }
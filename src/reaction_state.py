@@ -0,0 +1,183 @@
+import asyncio
+import gzip
+import json
+import logging
+import os
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Tuple
+
+SNAPSHOT_VERSION = 1
+
+
+def reaction_key(reaction: Any) -> str:
+    """Return a stable string key for a Telegram reaction."""
+    emoticon = getattr(reaction, 'emoticon', None)
+    if emoticon:
+        return emoticon
+    document_id = getattr(reaction, 'document_id', None)
+    if document_id is not None:
+        return f"custom:{document_id}"
+    return type(reaction).__name__  # e.g. ReactionPaid
+
+
+def reaction_counts(results: Iterable[Any]) -> Dict[str, int]:
+    """Convert a list of ``ReactionCount`` objects into an emoji -> count mapping."""
+    return {reaction_key(result.reaction): result.count for result in results}
+
+
+class ReactionStateStore:
+    """Last known reaction counts per (channel, message), bounded by LRU eviction.
+
+    Per channel it also keeps a baseline, the latest message ID of the
+    channel when the bot started tracking it, a high-water mark, the highest
+    message ID with a reaction update, and the highest message ID whose
+    counts were evicted. A message above the baseline and the eviction mark
+    that has no stored counts was posted while the channel was tracked and
+    had no reactions, which is what lets a catch-up after downtime tell new
+    reactions from forgotten or pre-existing ones.
+    """
+
+    def __init__(self, max_messages: int = 10000) -> None:
+        self.max_messages = max_messages
+        self._messages: 'OrderedDict[Tuple[int, int], Dict[str, int]]' = OrderedDict()
+        self._high_water: Dict[int, int] = {}
+        self._forgotten: Dict[int, int] = {}
+        self._baseline: Dict[int, int] = {}
+        self.evictions = 0
+
+    @classmethod
+    def from_config(cls, settings: Dict[str, Any]) -> 'ReactionStateStore':
+        """Build a store from the ``reaction_state`` config section."""
+        return cls(max_messages=settings.get('max_messages', 10000))
+
+    def __len__(self) -> int:
+        return len(self._messages)
+
+    def get(self, channel_id: int, message_id: int) -> Dict[str, int]:
+        """Return the stored counts of a message (empty if unknown)."""
+        return dict(self._messages.get((channel_id, message_id), {}))
+
+    def high_water_mark(self, channel_id: int) -> int:
+        """Return the highest message ID of the channel with a reaction update, or 0 if none was seen."""
+        return self._high_water.get(channel_id, 0)
+
+    def channels(self) -> List[int]:
+        """Return the channels that are tracked or have a high-water mark."""
+        return list({**self._high_water, **self._baseline})
+
+    def track(self, channel_id: int, latest_message_id: int) -> None:
+        """Start tracking a channel whose latest message is ``latest_message_id``.
+
+        Reactions on that message and older ones may predate tracking, so
+        they are never trusted to be absent. A channel already tracked
+        keeps its baseline.
+        """
+        self._baseline.setdefault(channel_id, latest_message_id)
+
+    def is_tracked(self, channel_id: int) -> bool:
+        """Return True if the channel has a baseline."""
+        return channel_id in self._baseline
+
+    def is_known(self, channel_id: int, message_id: int) -> bool:
+        """Return True if the stored counts of a message, possibly none, can be trusted.
+
+        Unknown messages are those of untracked channels, those posted before
+        tracking started and those whose counts may have been evicted.
+        """
+        if (channel_id, message_id) in self._messages:
+            return True
+        if channel_id not in self._baseline:
+            return False
+        return message_id > max(self._baseline[channel_id], self._forgotten.get(channel_id, 0))
+
+    def _put(self, key: Tuple[int, int], counts: Dict[str, int]) -> None:
+        self._messages[key] = counts
+        self._messages.move_to_end(key)
+        channel_id, message_id = key
+        if message_id > self._high_water.get(channel_id, 0):
+            self._high_water[channel_id] = message_id
+        while len(self._messages) > self.max_messages:
+            (channel_id, message_id), _ = self._messages.popitem(last=False)
+            if message_id > self._forgotten.get(channel_id, 0):
+                self._forgotten[channel_id] = message_id
+            self.evictions += 1
+
+    def diff(self, channel_id: int, message_id: int, counts: Dict[str, int]) -> Dict[str, int]:
+        """Store the new counts of a message and return the per-emoji deltas.
+
+        Emojis whose count did not change are left out of the result, so
+        re-sent aggregates produce an empty dict.
+        """
+        key = (channel_id, message_id)
+        previous = self._messages.get(key, {})
+        deltas = {}
+        for emoji, count in counts.items():
+            delta = count - previous.get(emoji, 0)
+            if delta:
+                deltas[emoji] = delta
+        for emoji, count in previous.items():
+            if emoji not in counts:
+                deltas[emoji] = -count
+        self._put(key, dict(counts))
+        return deltas
+
+    def _snapshot(self) -> Dict[str, Any]:
+        # Counts dicts are replaced rather than mutated, so a shallow copy is safe to hand to a thread
+        return {
+            'version': SNAPSHOT_VERSION,
+            'messages': [[channel_id, message_id, counts]
+                         for (channel_id, message_id), counts in self._messages.items()],
+            'marks': [[channel_id, self._high_water.get(channel_id, 0), self._forgotten.get(channel_id, 0),
+                       self._baseline.get(channel_id)]
+                      for channel_id in self.channels()],
+        }
+
+    @staticmethod
+    def _write_snapshot(path: str, snapshot: Dict[str, Any]) -> None:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with gzip.open(tmp_path, 'wt', encoding='utf-8') as file:
+            json.dump(snapshot, file, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp_path, path)
+
+    def save(self, path: str) -> None:
+        """Write a gzipped JSON snapshot of the store, replacing the file atomically."""
+        self._write_snapshot(path, self._snapshot())
+
+    def load(self, path: str) -> None:
+        """Restore the store from a snapshot written by :meth:`save`, if one exists."""
+        if not os.path.exists(path):
+            return
+        try:
+            with gzip.open(path, 'rt', encoding='utf-8') as file:
+                snapshot = json.load(file)
+        except (OSError, ValueError) as e:
+            logging.warning(f"Ignoring unreadable reaction state snapshot {path}: {e}")
+            return
+        if snapshot.get('version') != SNAPSHOT_VERSION:
+            logging.warning(f"Ignoring reaction state snapshot {path} with unknown version")
+            return
+        for channel_id, high_water, forgotten, *baseline in snapshot.get('marks', []):
+            if high_water:
+                self._high_water[channel_id] = max(high_water, self._high_water.get(channel_id, 0))
+            self._forgotten[channel_id] = max(forgotten, self._forgotten.get(channel_id, 0))
+            # Written before baselines were kept: messages up to the newest one may predate tracking
+            baseline = baseline[0] if baseline else high_water
+            if baseline is not None:
+                self.track(channel_id, baseline)
+        for channel_id, message_id, counts in snapshot['messages']:
+            self._put((channel_id, message_id), counts)
+        if 'marks' not in snapshot:
+            # Written before marks were kept: any message up to the newest one may have been evicted
+            self._forgotten.update(self._high_water)
+
+    async def run_snapshots(self, path: str, interval: float) -> None:
+        """Periodically write a snapshot without blocking the event loop."""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await asyncio.to_thread(self._write_snapshot, path, self._snapshot())
+            except Exception as e:
+                logging.error(f"Failed to save reaction state snapshot: {e}")
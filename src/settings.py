@@ -0,0 +1,33 @@
+from typing import Any, Dict, NamedTuple
+
+DEFAULT_CONFIG_PATH = 'config/config.yaml'
+
+
+class BotSettings(NamedTuple):
+    """The settings read for every reaction, parsed and validated once from the config dict."""
+    owner_id: int
+    max_reactions_per_message: int
+    fetch_user_data: bool
+    retry_attempts: int
+    retry_delay: float
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> 'BotSettings':
+        """Build settings from a loaded config, raising ValueError for missing or invalid values."""
+        try:
+            settings = cls(
+                owner_id=int(config['telegram']['owner_id']),
+                max_reactions_per_message=int(config['advanced_settings']['max_reactions_per_message']),
+                fetch_user_data=bool(config['advanced_settings']['fetch_user_data']),
+                retry_attempts=int(config['notifications']['retry_attempts']),
+                retry_delay=float(config['notifications']['retry_delay']),
+            )
+        except KeyError as e:
+            raise ValueError(f"Missing configuration setting: {e}") from e
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"Invalid configuration setting: {e}") from e
+        if settings.max_reactions_per_message < 1:
+            raise ValueError("advanced_settings.max_reactions_per_message must be at least 1")
+        if settings.retry_attempts < 1:
+            raise ValueError("notifications.retry_attempts must be at least 1")
+        return settings
@@ -0,0 +1,444 @@
+"""Run the bot as several shards, one Telegram session and one process each.
+
+Watched channels are spread over the sessions listed in the ``sharding``
+config section with consistent hashing. A supervisor process starts the
+shards, watches their heartbeats and moves the channels of a shard that
+died to the surviving ones. Every session must already be authorized (run
+the single-process bot once per session) because shards cannot prompt for
+a login code.
+
+Run from the repository root:
+
+    python -m src.sharding
+"""
+import asyncio
+import bisect
+import hashlib
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict
+from multiprocessing.managers import BaseManager
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+from src.update_filter import normalize_channel_id
+
+
+def _hash(key: str) -> int:
+    # Python's hash() is salted per process, so shards would disagree on it
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), 'big')
+
+
+class HashRing:
+    """Consistent hash ring mapping channel IDs to shards.
+
+    Each shard is placed on the ring ``virtual_nodes`` times, so channels
+    spread evenly and removing a shard only moves the channels it owned.
+    """
+
+    def __init__(self, nodes: Iterable[str] = (), virtual_nodes: int = 64) -> None:
+        self.virtual_nodes = virtual_nodes
+        self._points: List[int] = []
+        self._owners: Dict[int, str] = {}
+        self.nodes: List[str] = []
+        for node in nodes:
+            self.add(node)
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    def add(self, node: str) -> None:
+        if node in self.nodes:
+            return
+        self.nodes.append(node)
+        for replica in range(self.virtual_nodes):
+            point = _hash(f"{node}#{replica}")
+            self._owners[point] = node
+            bisect.insort(self._points, point)
+
+    def remove(self, node: str) -> None:
+        if node not in self.nodes:
+            return
+        self.nodes.remove(node)
+        self._points = [point for point in self._points if self._owners[point] != node]
+        self._owners = {point: owner for point, owner in self._owners.items() if owner != node}
+
+    def node_for(self, key: Hashable) -> Optional[str]:
+        """Return the shard that owns ``key``, or None if the ring is empty."""
+        if not self._points:
+            return None
+        index = bisect.bisect(self._points, _hash(str(key))) % len(self._points)
+        return self._owners[self._points[index]]
+
+    def assign(self, keys: Iterable[Hashable]) -> Dict[str, List[Hashable]]:
+        """Group ``keys`` by the shard that owns them; every shard gets an entry, possibly empty."""
+        assignment: Dict[str, List[Hashable]] = {node: [] for node in self.nodes}
+        for key in keys:
+            node = self.node_for(key)
+            if node is not None:
+                assignment[node].append(key)
+        return assignment
+
+
+class NotificationDedup:
+    """Table of the last reaction count reported to the owner for each message and emoji.
+
+    Shards share one instance through :class:`ShardManager`. While a channel
+    moves between shards both may see the same reactions; claiming counts
+    here makes sure each reaction is reported once. The new shard has no
+    reaction state for the channel yet, so it starts each message from the
+    counts :meth:`reported` returns. Entries expire ``ttl`` seconds after they
+    were last claimed, and the least recently claimed are evicted beyond
+    ``max_entries``.
+    """
+
+    def __init__(self, ttl: float = 86400, max_entries: int = 100000,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._reported: 'OrderedDict[Tuple[int, int, str], Tuple[int, float]]' = OrderedDict()
+        self.claimed = 0
+        self.rejected = 0
+
+    def claim(self, items: List[Tuple[Tuple[int, int, str], int]]) -> List[Optional[int]]:
+        """Claim the right to report ``count`` for each ``((channel_id, message_id, emoji), count)``.
+
+        Returns, per item, the count already reported (0 if none), or None if
+        the count has already been reported and the item must be skipped. A
+        count below the reported one is a removal: it is recorded, so the
+        reactions can be reported again once they are re-added.
+        """
+        now = self._clock()
+        results: List[Optional[int]] = []
+        # The manager serves each shard from its own thread
+        with self._lock:
+            for key, count in items:
+                key = tuple(key)
+                entry = self._reported.get(key)
+                reported = entry[0] if entry is not None and now - entry[1] < self.ttl else 0
+                if count <= reported:
+                    if count < reported:
+                        self._reported[key] = (count, now)
+                        self._reported.move_to_end(key)
+                    self.rejected += 1
+                    results.append(None)
+                    continue
+                self.claimed += 1
+                self._reported[key] = (count, now)
+                self._reported.move_to_end(key)
+                results.append(reported)
+            while len(self._reported) > self.max_entries:
+                self._reported.popitem(last=False)
+        return results
+
+    def reported(self, keys: List[Tuple[int, int, str]]) -> List[Optional[int]]:
+        """Return the count last reported for each ``(channel_id, message_id, emoji)``, or None if unknown."""
+        now = self._clock()
+        with self._lock:
+            entries = [self._reported.get(tuple(key)) for key in keys]
+        return [entry[0] if entry is not None and now - entry[1] < self.ttl else None for entry in entries]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {'entries': len(self._reported), 'claimed': self.claimed, 'rejected': self.rejected}
+
+
+class ShardManager(BaseManager):
+    """Manager process holding the :class:`NotificationDedup` table shared by the shards."""
+
+
+ShardManager.register('NotificationDedup', NotificationDedup, exposed=('claim', 'reported', 'stats'))
+
+
+def shard_path(path: str, shard_id: str) -> str:
+    """Return the name of a shard's own copy of the file at ``path``, e.g. ``data/reactions.a.db``."""
+    root, extension = os.path.splitext(path)
+    # Keep double extensions such as .json.gz after the shard name
+    if extension == '.gz':
+        root, inner = os.path.splitext(root)
+        extension = inner + extension
+    return f"{root}.{shard_id}{extension}"
+
+
+def shard_config(config: Dict[str, Any], shard_id: str, channels: List[int]) -> Dict[str, Any]:
+    """Return a copy of ``config`` for one shard: its session, its channels and its own state files."""
+    config = {section: dict(values) if isinstance(values, dict) else values for section, values in config.items()}
+    config['telegram']['session_name'] = shard_id
+    config.setdefault('filters', {})['watched_channels'] = list(channels)
+    config['logging']['log_file'] = shard_path(config['logging']['log_file'], shard_id)
+    reaction_state = config.setdefault('reaction_state', {})
+    snapshot_path = reaction_state.get('snapshot_path', 'data/reaction_state.json.gz')
+    reaction_state['snapshot_path'] = shard_path(snapshot_path, shard_id)
+    # One SQLite writer per database file; shards sharing one would lock each other out
+    event_store = config.setdefault('event_store', {})
+    event_store['path'] = shard_path(event_store.get('path', 'data/reactions.db'), shard_id)
+    return config
+
+
+def run_shard(shard_id: str, channels: List[int], config_path: str, dedup: Any,
+              control: Any, reports: Any) -> None:
+    """Process entry point of a shard: run the bot for ``channels`` until told to stop."""
+    from src import telegram_bot
+
+    config = shard_config(telegram_bot.load_config(config_path), shard_id, channels)
+    telegram_bot.setup_logging(config['logging']['log_file'], config['logging']['level'],
+                               config['logging'].get('format', 'text'), config['logging'].get('sampling'))
+    try:
+        asyncio.run(_run_shard(shard_id, config, dedup, control, reports))
+    except KeyboardInterrupt:
+        pass  # The supervisor stops shards through the control queue
+    finally:
+        telegram_bot.shutdown_logging()
+
+
+async def _run_shard(shard_id: str, config: Dict[str, Any], dedup: Any, control: Any, reports: Any) -> None:
+    from src import telegram_bot
+
+    client = telegram_bot.create_telegram_client(config['telegram']['session_name'],
+                                                 config['telegram']['api_id'],
+                                                 config['telegram']['api_hash'])
+    # Channel assignments come from the supervisor, not from reloads of the config file
+    bot = telegram_bot.ReactionBot(client, config, config_path=None, dedup=dedup)
+    # An empty assignment means no channels here, not every channel as in the single-process bot
+    bot.update_filter.set_watched(config['filters']['watched_channels'])
+    loop = asyncio.get_running_loop()
+
+    async def stop() -> None:
+        try:
+            await bot.stop()
+        finally:
+            # bot.run() calls stop() again once disconnected, which finds nothing left to drain
+            await client.disconnect()
+
+    def listen() -> None:
+        # Blocking queue reads happen on a thread; commands are handed to the loop
+        while True:
+            try:
+                command, *args = control.get()
+            except (EOFError, OSError):
+                command, args = 'stop', []
+            try:
+                if command == 'assign':
+                    loop.call_soon_threadsafe(bot.update_filter.set_watched, args[0])
+                    logging.info(f"Shard {shard_id} now watches {len(args[0])} channel(s)")
+                elif command == 'stop':
+                    # Drain while still connected, so queued notifications and lookups can finish
+                    asyncio.run_coroutine_threadsafe(stop(), loop)
+                    return
+            except RuntimeError:
+                return  # The loop has already finished
+
+    async def heartbeat(interval: float) -> None:
+        while True:
+            reports.put(('heartbeat', shard_id, {
+                'watched_channels': len(bot.update_filter.watched),
+                'dispatcher': bot.dispatcher.stats(),
+                'notifier': bot.notifier.stats(),
+            }))
+            await asyncio.sleep(interval)
+
+    threading.Thread(target=listen, name=f"shard-{shard_id}-control", daemon=True).start()
+    heartbeat_task = asyncio.create_task(heartbeat(config.get('sharding', {}).get('heartbeat_interval', 5)))
+    try:
+        await bot.run()
+    finally:
+        heartbeat_task.cancel()
+        await asyncio.gather(heartbeat_task, return_exceptions=True)
+
+
+class _Shard:
+    __slots__ = ('shard_id', 'process', 'control', 'last_seen', 'channels', 'restart_at', 'state')
+
+    def __init__(self, shard_id: str) -> None:
+        self.shard_id = shard_id
+        self.process: Any = None
+        self.control: Any = None
+        self.last_seen = 0.0
+        self.channels: List[int] = []
+        self.restart_at: Optional[float] = None
+        # 'running' shards own channels, 'starting' ones wait for their first heartbeat
+        self.state = 'stopped'
+
+
+class ShardSupervisor:
+    """Start one process per session and keep every watched channel assigned to a live shard.
+
+    A shard counts as dead once its process exits or it misses heartbeats for
+    ``heartbeat_timeout`` seconds. Its channels move to the surviving shards
+    at once; with ``restart`` enabled the shard is started again after
+    ``restart_delay`` seconds and takes its channels back once it reports in.
+    """
+
+    def __init__(self, config: Dict[str, Any], config_path: str,
+                 process_factory: Optional[Callable[..., Any]] = None, dedup: Any = None,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        settings = config.get('sharding', {})
+        sessions = settings.get('sessions') or []
+        if not sessions:
+            raise ValueError("sharding.sessions must list at least one session name")
+        channels = config.get('filters', {}).get('watched_channels') or []
+        if not channels:
+            raise ValueError("Sharding needs filters.watched_channels to know which channels to spread")
+
+        self.config_path = config_path
+        self.channels = sorted({normalize_channel_id(int(channel_id)) for channel_id in channels})
+        self.heartbeat_interval = settings.get('heartbeat_interval', 5)
+        self.heartbeat_timeout = settings.get('heartbeat_timeout', 30)
+        self.restart = settings.get('restart', True)
+        self.restart_delay = settings.get('restart_delay', 10)
+        self.dedup_ttl = settings.get('dedup_ttl', 86400)
+        self.dedup_max_entries = settings.get('dedup_max_entries', 100000)
+        self.ring = HashRing(virtual_nodes=settings.get('virtual_nodes', 64))
+        self.shards: Dict[str, _Shard] = {session: _Shard(session) for session in sessions}
+        self.reassignments = 0
+        self.restarts = 0
+
+        self._context = multiprocessing.get_context('spawn')  # Shards must not inherit the parent's event loop
+        self._process_factory = process_factory or self._spawn
+        self._clock = clock
+        self._manager: Optional[ShardManager] = None
+        self.dedup = dedup
+        self.reports: Any = self._context.Queue()
+        self._stopping = False
+
+    def _spawn(self, target: Callable[..., None], args: Tuple[Any, ...], name: str) -> Any:
+        return self._context.Process(target=target, args=args, name=name)
+
+    def _launch(self, shard: _Shard) -> None:
+        shard.control = self._context.Queue()
+        shard.process = self._process_factory(
+            run_shard, (shard.shard_id, list(shard.channels), self.config_path, self.dedup,
+                        shard.control, self.reports), f"shard-{shard.shard_id}")
+        shard.process.start()
+        shard.last_seen = self._clock()
+        shard.restart_at = None
+        shard.state = 'starting'
+        logging.info(f"Started shard {shard.shard_id} with {len(shard.channels)} channel(s)")
+
+    def start(self) -> None:
+        """Start the dedup table and one process per session."""
+        if self.dedup is None:
+            self._manager = ShardManager(ctx=self._context)
+            self._manager.start()
+            self.dedup = self._manager.NotificationDedup(self.dedup_ttl, self.dedup_max_entries)
+        for shard_id in self.shards:
+            self.ring.add(shard_id)
+        for shard_id, channels in self.ring.assign(self.channels).items():
+            shard = self.shards[shard_id]
+            shard.channels = channels
+            self._launch(shard)
+            shard.state = 'running'
+
+    def _rebalance(self) -> None:
+        """Recompute the assignment and tell every shard whose channels changed."""
+        for shard_id, channels in self.ring.assign(self.channels).items():
+            shard = self.shards[shard_id]
+            if channels != shard.channels:
+                shard.channels = channels
+                shard.control.put(('assign', channels))
+                self.reassignments += 1
+                logging.info(f"Assigned {len(channels)} channel(s) to shard {shard_id}")
+        if not self.ring.nodes:
+            logging.error("No shard is alive; reactions are not being monitored")
+
+    def _fail(self, shard: _Shard, reason: str) -> None:
+        logging.error(f"Shard {shard.shard_id} {reason}; moving its {len(shard.channels)} channel(s)")
+        if shard.process.is_alive():
+            shard.process.terminate()
+        shard.process.join(timeout=5)
+        shard.state = 'failed'
+        shard.channels = []
+        self.ring.remove(shard.shard_id)
+        self._rebalance()
+        if self.restart:
+            shard.restart_at = self._clock() + self.restart_delay
+
+    def handle_report(self, report: Tuple[Any, ...]) -> None:
+        kind, shard_id, stats = report
+        shard = self.shards.get(shard_id)
+        # Heartbeats still queued from a shard that was already failed are ignored
+        if kind != 'heartbeat' or shard is None or shard.state not in ('running', 'starting'):
+            return
+        shard.last_seen = self._clock()
+        logging.debug(f"Shard {shard_id} heartbeat: {stats}")
+        if shard.state == 'starting':
+            # A restarted shard is back: give it its share of the channels again
+            shard.state = 'running'
+            self.ring.add(shard_id)
+            self._rebalance()
+
+    def check(self) -> None:
+        """Fail shards that exited or stopped sending heartbeats, and restart those that are due."""
+        now = self._clock()
+        for shard in self.shards.values():
+            if shard.state in ('running', 'starting'):
+                if not shard.process.is_alive():
+                    self._fail(shard, f"exited with code {shard.process.exitcode}")
+                elif now - shard.last_seen > self.heartbeat_timeout:
+                    self._fail(shard, f"sent no heartbeat for {now - shard.last_seen:.0f}s")
+            elif shard.state == 'failed' and shard.restart_at is not None and now >= shard.restart_at:
+                self.restarts += 1
+                self._launch(shard)
+
+    def run(self) -> None:
+        """Supervise the shards until :meth:`stop` is called or the process is interrupted."""
+        self.start()
+        try:
+            while not self._stopping:
+                try:
+                    self.handle_report(self.reports.get(timeout=self.heartbeat_interval))
+                except queue.Empty:
+                    pass
+                self.check()
+        except KeyboardInterrupt:
+            logging.info("Stopping shards...")
+        finally:
+            self.stop()
+
+    def stop(self, timeout: float = 30) -> None:
+        """Ask every shard to drain and disconnect, then terminate the ones that do not exit in time."""
+        self._stopping = True
+        for shard in self.shards.values():
+            if shard.process is not None and shard.process.is_alive():
+                shard.control.put(('stop',))
+        deadline = self._clock() + timeout
+        for shard in self.shards.values():
+            if shard.process is None:
+                continue
+            shard.process.join(timeout=max(0, deadline - self._clock()))
+            if shard.process.is_alive():
+                logging.warning(f"Shard {shard.shard_id} did not stop in time, terminating it")
+                shard.process.terminate()
+        if self._manager is not None:
+            self._manager.shutdown()
+            self._manager = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'shards': {shard_id: {'state': shard.state, 'channels': len(shard.channels)}
+                       for shard_id, shard in self.shards.items()},
+            'reassignments': self.reassignments,
+            'restarts': self.restarts,
+        }
+
+
+def main(config_path: str = 'config/config.yaml') -> None:
+    """Run the sharded bot from the ``sharding`` section of the config file."""
+    from src import telegram_bot
+
+    config = telegram_bot.load_config(config_path)
+    telegram_bot.setup_logging(config['logging']['log_file'], config['logging']['level'],
+                               config['logging'].get('format', 'text'), config['logging'].get('sampling'))
+    try:
+        ShardSupervisor(config, config_path).run()
+    finally:
+        telegram_bot.shutdown_logging()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,23 +1,68 @@
 import os
+import queue
 import logging
 import asyncio
-from telethon import TelegramClient, events
-from telethon.tl.types import UpdateMessageReactions
+import importlib
+import time
 import yaml
-from logging.handlers import RotatingFileHandler
-from typing import Dict, Any
-from dotenv import load_dotenv
-import requests
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import TYPE_CHECKING, Dict, Any, List, Optional, Union
+from src.settings import DEFAULT_CONFIG_PATH, BotSettings
+from src.attribution import ReactionAttribution
+from src.reaction_state import ReactionStateStore, reaction_counts
+from src.notifier import NotificationQueue, ReactionNotice
+from src.rate_limiter import RateLimiter
+from src.dispatcher import UpdateDispatcher
+from src.update_filter import UpdateFilter
+from src.event_store import ReactionEventStore
+from src.catch_up import ReactionCatchUp, ReplayedUpdate
+from src.log_pipeline import JsonFormatter, SamplingFilter
+from src.metrics import (
+    REGISTRY,
+    REACTIONS_PROCESSED,
+    MESSAGES_SENT,
+    MESSAGES_FAILED,
+    PROCESS_REACTIONS_SECONDS,
+    SEND_MESSAGE_SECONDS,
+    EVENT_LOOP_LAG_SECONDS,
+)
 
-# Load environment variables from a .env file
-load_dotenv()
+if TYPE_CHECKING:
+    from telethon import TelegramClient
+    from telethon.tl.types import UpdateMessageReactions
 
-def load_config(config_path: str = 'config/config.yaml') -> Dict[str, Any]:
+# Telethon takes most of the import time, so it is imported when a client is first needed
+_TELETHON_NAMES = ('TelegramClient', 'events')
+
+def __getattr__(name: str) -> Any:
+    if name in _TELETHON_NAMES:
+        value = getattr(importlib.import_module('telethon'), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def _telethon(name: str) -> Any:
+    # Module globals first, so a test double patched over the name is used
+    return globals()[name] if name in globals() else __getattr__(name)
+
+REQUIRED_ENV_VARS = ('TELEGRAM_API_ID', 'TELEGRAM_API_HASH', 'TELEGRAM_BOT_TOKEN', 'OWNER_USER_ID')
+
+def load_config(config_path: str = DEFAULT_CONFIG_PATH) -> Dict[str, Any]:
     """Load and return configuration settings from a YAML file."""
+    # Load environment variables from a .env file; done here rather than at import time
+    from dotenv import load_dotenv
+    load_dotenv()
+
     try:
         with open(config_path, 'r') as file:
             config = yaml.safe_load(file)
 
+            # Validate the necessary environment variables
+            missing = [name for name in REQUIRED_ENV_VARS if not os.getenv(name)]
+            if missing:
+                raise ValueError(f"Missing required environment variables for Telegram API credentials: "
+                                 f"{', '.join(missing)}")
+
             # Replace placeholders with actual environment variable values
             config['telegram']['api_id'] = int(os.getenv('TELEGRAM_API_ID'))
             config['telegram']['api_hash'] = os.getenv('TELEGRAM_API_HASH')
@@ -25,11 +70,6 @@ def load_config(config_path: str = 'config/config.yaml') -> Dict[str, Any]:
             config['telegram']['owner_id'] = int(os.getenv('OWNER_USER_ID'))
             config['logging']['level'] = os.getenv('LOG_LEVEL', 'INFO')
 
-            # Validate the necessary environment variables
-            if not all([config['telegram']['api_id'], config['telegram']['api_hash'],
-                        config['telegram']['bot_token'], config['telegram']['owner_id']]):
-                raise ValueError("Missing one or more required environment variables for Telegram API credentials.")
-
             return config
     except FileNotFoundError:
         logging.error("Configuration file not found!")
@@ -41,85 +81,197 @@ def load_config(config_path: str = 'config/config.yaml') -> Dict[str, Any]:
         logging.error(f"Environment variable error: {e}")
         raise
 
-def setup_logging(log_file: str, level: str) -> None:
-    """Setup logging configuration with rotation and structured logging."""
-    os.makedirs('logs', exist_ok=True)  # Ensure the logs directory exists
+# Listener of the currently installed logging pipeline, replaced by each setup_logging call
+_log_listener: Optional[QueueListener] = None
+
+def setup_logging(log_file: str, level: str, log_format: str = 'text',
+                  sampling: Optional[Dict[str, float]] = None) -> QueueListener:
+    """Setup logging with rotation, off-loop file I/O and optional JSON lines and sampling.
+
+    Records are put on an in-memory queue by the root logger and written to
+    the file and console by a background listener thread, so disk I/O never
+    blocks the event loop.
+    """
+    global _log_listener
+    os.makedirs(os.path.dirname(log_file) or '.', exist_ok=True)  # Ensure the logs directory exists
 
     # Define the format for log messages
-    log_format = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
     date_format = '%Y-%m-%d %H:%M:%S'
+    if log_format == 'json':
+        formatter = JsonFormatter(datefmt=date_format)
+    else:
+        formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s', date_format)
 
     # Configure logging
     logger = logging.getLogger()
-    logger.setLevel(getattr(logging, level.upper(), 'INFO'))
+    logger.setLevel(getattr(logging, level.upper(), logging.INFO))
 
     # File handler with rotation
     file_handler = RotatingFileHandler(
         log_file, maxBytes=5 * 1024 * 1024, backupCount=5  # 5 MB per file, keep 5 backups
     )
-    file_handler.setFormatter(logging.Formatter(log_format, date_format))
+    file_handler.setFormatter(formatter)
 
     # Stream handler for console output
     stream_handler = logging.StreamHandler()
-    stream_handler.setFormatter(logging.Formatter(log_format, date_format))
+    stream_handler.setFormatter(formatter)
+
+    # Replace the pipeline installed by a previous call instead of stacking handlers
+    shutdown_logging()
+
+    # Sampling happens in the queue handler, before a dropped record costs any formatting or I/O
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    queue_handler = QueueHandler(log_queue)
+    if sampling:
+        queue_handler.addFilter(SamplingFilter(sampling))
+    logger.addHandler(queue_handler)
 
-    # Add handlers to the logger
-    logger.addHandler(file_handler)
-    logger.addHandler(stream_handler)
+    _log_listener = QueueListener(log_queue, file_handler, stream_handler, respect_handler_level=True)
+    _log_listener.start()
+    return _log_listener
 
-def create_telegram_client(session_name: str, api_id: int, api_hash: str) -> TelegramClient:
-    """Initialize and return a Telegram client."""
-    return TelegramClient(session_name, api_id, api_hash)
+def shutdown_logging() -> None:
+    """Flush queued log records and remove the pipeline installed by :func:`setup_logging`."""
+    global _log_listener
+    if _log_listener is not None:
+        _log_listener.stop()
+        for handler in _log_listener.handlers:
+            handler.close()
+        _log_listener = None
+    logger = logging.getLogger()
+    for handler in [handler for handler in logger.handlers if isinstance(handler, QueueHandler)]:
+        logger.removeHandler(handler)
+
+def create_telegram_client(session_name: str, api_id: int, api_hash: str) -> 'TelegramClient':
+    """Initialize and return a Telegram client.
+
+    Telethon would otherwise sleep through short flood waits inside the call,
+    hiding them from the :class:`RateLimiter` that pauses the affected bucket.
+    """
+    return _telethon('TelegramClient')(session_name, api_id, api_hash, flood_sleep_threshold=0)
+
+async def process_reactions(event: 'UpdateMessageReactions', client: 'TelegramClient',
+                            config: Union[BotSettings, Dict[str, Any]],
+                            attribution: Optional[ReactionAttribution] = None,
+                            state_store: Optional[ReactionStateStore] = None,
+                            notifier: Optional[NotificationQueue] = None,
+                            event_store: Optional[ReactionEventStore] = None) -> None:
+    """Process reactions from a message and notify the owner of new ones.
 
-async def process_reactions(event: UpdateMessageReactions, client: TelegramClient, config: Dict[str, Any]) -> None:
-    """Process reactions from a message and notify the owner."""
-    message_id = event.message_id
+    With a state store, only emojis whose count increased since the last
+    update are reported; removed reactions just update the stored counts.
+    Messages whose previous counts are unknown to the store, because they
+    were evicted or predate the tracking of their channel, are only stored,
+    except for the counts the notifier's dedup table says another shard
+    already reported: those are the baseline of a channel taken over.
+    With a notifier, the changes are queued for a coalesced summary instead
+    of being sent one message at a time; removals are queued as well, for
+    its dedup table. With an event store, every count
+    change (including removals) is recorded for later queries. When user
+    data is fetched, each change is attributed to the users who made it by
+    ``attribution``. ``config`` is the bot's :class:`BotSettings`, or a
+    config dict to parse them from.
+    """
+    settings = config if isinstance(config, BotSettings) else BotSettings.from_config(config)
+    message_id = event.msg_id
     channel_id = event.peer.channel_id
-    reactions = event.reactions.results
-
-    for reaction in reactions[:config['advanced_settings']['max_reactions_per_message']]:
-        emoji = reaction.reaction.emoticon
-        count = reaction.count
-
-        async for user in client.iter_participants(channel_id, limit=100):
-            if user.bot or not config['advanced_settings']['fetch_user_data']:
-                continue  # Skip bots or fetching user data if disabled
-            username = user.username or "Unknown"
-            user_id = user.id
-            first_name = user.first_name or ""
-            last_name = user.last_name or ""
-
-            message = (
-                f"User {username} (ID: {user_id}, Name: {first_name} {last_name}) "
+    counts = reaction_counts(event.reactions.results)
+
+    if state_store is not None:
+        if not state_store.is_known(channel_id, message_id):
+            # Evicted, or older than the tracking of its channel: the counts are not all new
+            reported = {}
+            if notifier is not None:
+                reported = await notifier.reported_counts(channel_id, message_id, list(counts))
+            state_store.diff(channel_id, message_id, {**counts, **reported})
+            if not reported:
+                logging.debug("Seeded reaction counts of message %s in channel %s", message_id, channel_id,
+                              extra={'category': 'reaction', 'channel_id': channel_id, 'message_id': message_id})
+                return
+        deltas = state_store.diff(channel_id, message_id, counts)
+    else:
+        deltas = counts
+    if event_store is not None:
+        for emoji, delta in deltas.items():
+            event_store.append(channel_id, message_id, emoji, delta)
+    if notifier is not None:
+        for emoji, delta in deltas.items():
+            if delta < 0:
+                await notifier.submit(ReactionNotice(channel_id, message_id, emoji, delta, counts.get(emoji, 0)))
+    changes = [(emoji, delta) for emoji, delta in deltas.items() if delta > 0]
+    changes = changes[:settings.max_reactions_per_message]
+    if not changes:
+        return  # Telegram re-sent counts we already know about
+    REACTIONS_PROCESSED.inc(len(changes))
+
+    reactors: Dict[str, List[Any]] = {}
+    if settings.fetch_user_data:
+        # Only the reactors of the changed emojis are looked up, whatever the size of the channel
+        if attribution is None:
+            attribution = ReactionAttribution()
+        reactors = await attribution.attribute(client, channel_id, message_id, changes)
+
+    if notifier is not None:
+        for emoji, delta in changes:
+            count = counts.get(emoji, 0)
+            users = tuple(f"{user.username or 'Unknown'} (ID: {user.id})"
+                          for user in reactors.get(emoji, ()) if not user.bot)
+            logging.debug("Reaction %s %+d on message %s in channel %s", emoji, delta, message_id, channel_id,
+                          extra={'category': 'reaction', 'channel_id': channel_id, 'message_id': message_id,
+                                 'emoji': emoji, 'delta': delta, 'count': count})
+            await notifier.submit(ReactionNotice(channel_id, message_id, emoji, delta, count, users))
+        return
+
+    for emoji, delta in changes:
+        count = counts.get(emoji, 0)
+        users = [user for user in reactors.get(emoji, ()) if not user.bot]  # Skip bots
+
+        if not users:
+            messages = [
+                f"Message ID {message_id} in channel ID {channel_id} received {delta} new {emoji} "
+                f"reaction(s), for a total count of {count} reactions."
+            ]
+        else:
+            messages = [
+                f"User {user.username or 'Unknown'} (ID: {user.id}, "
+                f"Name: {user.first_name or ''} {user.last_name or ''}) "
                 f"reacted with {emoji} to message ID {message_id} "
                 f"in channel ID {channel_id} with a total count of {count} reactions."
-            )
-            logging.info(f"Processing reaction: {message}")
-            await send_message_with_retry(client, config['telegram']['owner_id'], message,
-                                          config['notifications']['retry_attempts'],
-                                          config['notifications']['retry_delay'])
-
-async def send_message(client: TelegramClient, chat_id: int, text: str) -> None:
-    """Send a message to the specified chat ID."""
+                for user in users
+            ]
+
+        for message in messages:
+            logging.info("Processing reaction %s %+d on message %s in channel %s", emoji, delta, message_id, channel_id,
+                         extra={'category': 'reaction', 'channel_id': channel_id, 'message_id': message_id,
+                                'emoji': emoji, 'delta': delta, 'count': count})
+            await send_message_with_retry(client, settings.owner_id, message,
+                                          settings.retry_attempts, settings.retry_delay)
+
+async def send_message(client: 'TelegramClient', chat_id: int, text: str) -> None:
+    """Send a message to the specified chat ID, re-raising any failure."""
+    started = time.perf_counter()
     try:
         await client.send_message(chat_id, text)
-        logging.info(f"Message sent successfully to {chat_id}: {text}")
     except Exception as e:
-        logging.error(f"Failed to send message to {chat_id}: {e}")
+        logging.error(f"Failed to send message to {chat_id}: {e}", extra={'category': 'send', 'chat_id': chat_id})
+        raise
+    finally:
+        latency = time.perf_counter() - started
+        SEND_MESSAGE_SECONDS.observe(latency)
+    logging.info("Message sent successfully to %s in %.3fs", chat_id, latency,
+                 extra={'category': 'send', 'chat_id': chat_id, 'latency': latency})
 
-async def send_message_with_retry(client: TelegramClient, chat_id: int, text: str, retries: int = 3, delay: int = 2) -> None:
-    """Send a message with retry logic on failure."""
-    attempt = 0
-    while attempt < retries:
-        try:
-            await send_message(client, chat_id, text)
-            break
-        except Exception as e:
-            attempt += 1
-            logging.warning(f"Failed to send message: {e}. Retry {attempt}/{retries}")
-            await asyncio.sleep(delay)
-            if attempt == retries:
-                logging.error(f"Failed to send message after {retries} attempts: {text}")
+async def send_message_with_retry(client: 'TelegramClient', chat_id: int, text: str, retries: int = 3, delay: int = 2,
+                                  rate_limiter: Optional[RateLimiter] = None) -> None:
+    """Send a message under the rate limits, retrying with exponential backoff on failure."""
+    limiter = rate_limiter if rate_limiter is not None else RateLimiter.unlimited()
+    try:
+        await limiter.call(chat_id, lambda: send_message(client, chat_id, text), attempts=retries, base_delay=delay)
+        MESSAGES_SENT.inc()
+    except Exception as e:
+        MESSAGES_FAILED.inc()
+        logging.error("Failed to send a %d character message to %s after %d attempts: %s", len(text), chat_id,
+                      retries, e, extra={'category': 'send', 'chat_id': chat_id})
 
 async def monitor_bot_health(interval: int) -> None:
     """Log the bot's health status at regular intervals."""
@@ -127,24 +279,170 @@ async def monitor_bot_health(interval: int) -> None:
         logging.info("Bot health check: Active and running")
         await asyncio.sleep(interval)
 
+async def monitor_event_loop_lag(interval: float) -> None:
+    """Record how late the event loop wakes up a task sleeping for ``interval`` seconds."""
+    loop = asyncio.get_running_loop()
+    while True:
+        started = loop.time()
+        await asyncio.sleep(interval)
+        EVENT_LOOP_LAG_SECONDS.observe(max(loop.time() - started - interval, 0.0))
+
+def register_metrics(update_filter: UpdateFilter, dispatcher: UpdateDispatcher, notifier: NotificationQueue,
+                     attribution: ReactionAttribution, rate_limiter: RateLimiter) -> None:
+    """Expose the counters of the running components; they are only read when metrics are scraped."""
+    REGISTRY.callback('reaction_bot_updates_received_total', 'Raw updates seen, by filter result.',
+                      lambda: [({'result': 'accepted'}, update_filter.accepted),
+                               ({'result': 'filtered_type'}, update_filter.filtered_type),
+                               ({'result': 'filtered_channel'}, update_filter.filtered_channel)],
+                      'counter')
+    REGISTRY.callback('reaction_bot_reactor_requests_total', 'Reactor lists and user batches fetched from Telegram.',
+                      lambda: [({'kind': 'reactors'}, attribution.requests),
+                               ({'kind': 'users'}, attribution.resolves)],
+                      'counter')
+    REGISTRY.callback('reaction_bot_user_cache_lookups_total', 'User entity cache lookups.',
+                      lambda: [({'result': 'hit'}, attribution.user_cache.hits),
+                               ({'result': 'miss'}, attribution.user_cache.misses)],
+                      'counter')
+    REGISTRY.callback('reaction_bot_dispatcher_pending', 'Updates waiting for a worker.',
+                      lambda: dispatcher.pending)
+    REGISTRY.callback('reaction_bot_dispatcher_dropped_total', 'Updates dropped because a queue was full.',
+                      lambda: dispatcher.dropped, 'counter')
+    REGISTRY.callback('reaction_bot_dispatcher_channel_lag_seconds',
+                      'Age of the oldest pending update of each channel with pending updates.',
+                      lambda: [({'channel_id': channel_id}, stats['lag'])
+                               for channel_id, stats in dispatcher.channel_stats().items()])
+    REGISTRY.callback('reaction_bot_notification_queue_depth', 'Reaction changes waiting to be summarized.',
+                      lambda: notifier.depth)
+    REGISTRY.callback('reaction_bot_notification_flush_seconds', 'Duration of the last notification flush.',
+                      lambda: notifier.last_flush_latency)
+    REGISTRY.callback('reaction_bot_rate_limited_calls_total', 'Outbound calls affected by rate limiting.',
+                      lambda: [({'outcome': 'throttled'}, rate_limiter.throttled),
+                               ({'outcome': 'retried'}, rate_limiter.retried),
+                               ({'outcome': 'dropped'}, rate_limiter.dropped),
+                               ({'outcome': 'flood_wait'}, rate_limiter.flood_waits)],
+                      'counter')
+
+class ReactionBot:
+    """The reaction monitoring pipeline wired around a connected Telegram client.
+
+    Updates flow from the Raw handler through the update filter and the
+    per-channel dispatcher into :func:`process_reactions`, which records
+    changes in the event store and queues owner notifications. ``dedup`` is
+    the notification table shared by the shards of a sharded run.
+    """
+
+    def __init__(self, client: 'TelegramClient', config: Dict[str, Any],
+                 config_path: Optional[str] = DEFAULT_CONFIG_PATH, dedup: Optional[Any] = None) -> None:
+        self.client = client
+        self.config = config
+        # Parsed once here, so the per-reaction path does no nested dict lookups
+        self.settings = BotSettings.from_config(config)
+        self.config_path = config_path
+        self._tasks: List[asyncio.Task] = []
+
+        self.rate_limiter = RateLimiter.from_config(config.get('rate_limits', {}))
+        self.attribution = ReactionAttribution.from_config(config.get('attribution', {}), self.rate_limiter)
+
+        state_settings = config.get('reaction_state', {})
+        self.state_store = ReactionStateStore.from_config(state_settings)
+        self.snapshot_path = state_settings.get('snapshot_path', 'data/reaction_state.json.gz')
+
+        self.notifier = NotificationQueue.from_config(self.notify_owner, config['notifications'], dedup)
+        self.event_store = ReactionEventStore.from_config(config.get('event_store', {}))
+        self.dispatcher = UpdateDispatcher.from_config(self.process_update, config.get('dispatcher', {}))
+        self.update_filter = UpdateFilter.from_config(config.get('filters', {}))
+        self.catch_up = ReactionCatchUp.from_config(client, self.state_store, self.replay_update,
+                                                    config.get('catch_up', {}), self.rate_limiter)
+
+        register_metrics(self.update_filter, self.dispatcher, self.notifier, self.attribution, self.rate_limiter)
+
+        # The filter runs synchronously inside Telethon, before a handler coroutine is created
+        client.add_event_handler(self.handle_update, _telethon('events').Raw(func=self.update_filter))
+
+    async def handle_update(self, event: 'UpdateMessageReactions') -> None:
+        # Hand off to the per-channel workers so a slow channel does not hold up other updates
+        self.dispatcher.submit(event.peer.channel_id, event)
+
+    async def replay_update(self, replayed: ReplayedUpdate) -> None:
+        # Queued behind the live updates of the channel, so the channel is still processed in order
+        self.dispatcher.submit(replayed.update.peer.channel_id, replayed)
+
+    async def process_update(self, event: Union['UpdateMessageReactions', ReplayedUpdate]) -> None:
+        if isinstance(event, ReplayedUpdate):
+            if self.state_store.get(event.update.peer.channel_id, event.update.msg_id) != event.previous:
+                return  # A live update was processed after the catch-up fetched these counts
+            event = event.update
+        if not self.state_store.is_tracked(event.peer.channel_id):
+            # Runs on the channel's worker, so later updates of the channel wait for the baseline
+            await self.catch_up.track(event.peer.channel_id)
+        with PROCESS_REACTIONS_SECONDS.time():
+            await process_reactions(event, self.client, self.settings, self.attribution, self.state_store,
+                                    self.notifier, self.event_store)
+
+    async def notify_owner(self, text: str) -> None:
+        await send_message_with_retry(self.client, self.settings.owner_id, text,
+                                      self.settings.retry_attempts, self.settings.retry_delay,
+                                      self.rate_limiter)
+
+    async def start(self) -> None:
+        """Restore saved state and start the background workers."""
+        self.state_store.load(self.snapshot_path)
+        logging.info(f"Loaded reaction state for {len(self.state_store)} messages")
+
+        config = self.config
+        self._tasks = [
+            asyncio.create_task(monitor_bot_health(config['health_check']['interval'])),
+            asyncio.create_task(monitor_event_loop_lag(config.get('metrics', {}).get('loop_lag_interval', 1))),
+            asyncio.create_task(self.state_store.run_snapshots(
+                self.snapshot_path, config.get('reaction_state', {}).get('snapshot_interval', 60))),
+        ]
+        if self.config_path:
+            self._tasks.append(asyncio.create_task(self.update_filter.run_reload(
+                self.config_path, config.get('filters', {}).get('reload_interval', 30))))
+        self.event_store.start()
+        self.notifier.start()
+        self.dispatcher.start()
+        if config.get('catch_up', {}).get('enabled', True):
+            # Live updates are already flowing; the catch-up only fills the gap left by the downtime
+            channels = self.state_store.channels() if self.update_filter.watch_all else self.update_filter.watched
+            self._tasks.append(asyncio.create_task(self.catch_up.run(channels)))
+
+    async def stop(self) -> None:
+        """Process queued updates, flush notifications and save state, then stop the background workers."""
+        # Stop taking updates first, so a reused client does not feed a stopped pipeline
+        self.client.remove_event_handler(self.handle_update)
+        await self.dispatcher.close()
+        await self.notifier.close()
+        await asyncio.to_thread(self.event_store.close)
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self.state_store.save(self.snapshot_path)
+
+    async def run(self) -> None:
+        """Start the pipeline and run it until the client disconnects."""
+        await self.client.start()
+        logging.info("Client is running...")
+        await self.start()
+        try:
+            await self.client.run_until_disconnected()
+        finally:
+            await self.stop()
+
 async def main() -> None:
     """Main function to start the Telegram bot."""
     config = load_config()
-    setup_logging(config['logging']['log_file'], config['logging']['level'])
+    setup_logging(config['logging']['log_file'], config['logging']['level'],
+                  config['logging'].get('format', 'text'), config['logging'].get('sampling'))
 
     client = create_telegram_client(config['telegram']['session_name'],
                                     config['telegram']['api_id'],
                                     config['telegram']['api_hash'])
-
-    @client.on(events.Raw)
-    async def handler(event):
-        if isinstance(event, UpdateMessageReactions):
-            await process_reactions(event, client, config)
-
-    await client.start()
-    logging.info("Client is running...")
-    asyncio.create_task(monitor_bot_health(config['health_check']['interval']))
-    await client.run_until_disconnected()
+    try:
+        await ReactionBot(client, config).run()
+    finally:
+        shutdown_logging()
 
 if __name__ == "__main__":
     asyncio.run(main())
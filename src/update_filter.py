@@ -0,0 +1,112 @@
+import asyncio
+import logging
+import os
+from typing import Any, Dict, FrozenSet, Iterable, Optional, Tuple
+
+import yaml
+
+DEFAULT_UPDATE_TYPES = ('UpdateMessageReactions',)
+
+
+def normalize_channel_id(channel_id: int) -> int:
+    """Return the bare ID of a channel given either its bare or its marked (-100...) ID."""
+    if channel_id < 0:
+        from telethon import utils
+        channel_id, _ = utils.resolve_id(channel_id)
+    return channel_id
+
+
+def resolve_update_types(names: Iterable[str]) -> Tuple[type, ...]:
+    """Map update type names such as ``UpdateMessageReactions`` to their Telethon classes."""
+    from telethon.tl import types
+    resolved = []
+    for name in names:
+        update_type = getattr(types, name, None)
+        if not isinstance(update_type, type):
+            raise ValueError(f"Unknown update type in filters.update_types: {name}")
+        resolved.append(update_type)
+    return tuple(resolved)
+
+
+class UpdateFilter:
+    """Cheap synchronous filter for raw updates, meant for ``events.Raw(func=...)``.
+
+    Telethon calls it before the handler coroutine is created, so updates of
+    other types, or from channels outside the watch-list, cost only an
+    ``isinstance`` check and a set lookup. An empty watch-list accepts every
+    channel.
+    """
+
+    def __init__(self, update_types: Iterable[str] = DEFAULT_UPDATE_TYPES,
+                 watched_channels: Iterable[int] = ()) -> None:
+        self.update_types: Tuple[type, ...] = ()
+        self.watched: FrozenSet[int] = frozenset()
+        self.watch_all = True
+        self.accepted = 0
+        self.filtered_type = 0
+        self.filtered_channel = 0
+        self._config_mtime: Optional[float] = None
+        self.configure({'update_types': list(update_types), 'watched_channels': list(watched_channels)})
+
+    @classmethod
+    def from_config(cls, settings: Dict[str, Any]) -> 'UpdateFilter':
+        """Build a filter from the ``filters`` config section."""
+        return cls(update_types=settings.get('update_types') or DEFAULT_UPDATE_TYPES,
+                   watched_channels=settings.get('watched_channels') or ())
+
+    def configure(self, settings: Dict[str, Any]) -> None:
+        """Replace the accepted update types and the watch-list."""
+        # Build both before assigning so a bad config leaves the old filter in place
+        update_types = resolve_update_types(settings.get('update_types') or DEFAULT_UPDATE_TYPES)
+        watched = frozenset(normalize_channel_id(int(channel_id))
+                            for channel_id in settings.get('watched_channels') or ())
+        self.update_types = update_types
+        self.set_watched(watched, watch_all=not watched)
+
+    def set_watched(self, channel_ids: Iterable[int], watch_all: bool = False) -> None:
+        """Replace the watch-list; with ``watch_all`` every channel is accepted."""
+        self.watched = frozenset(normalize_channel_id(int(channel_id)) for channel_id in channel_ids)
+        self.watch_all = watch_all
+
+    def __call__(self, update: Any) -> bool:
+        if not isinstance(update, self.update_types):
+            self.filtered_type += 1
+            return False
+        channel_id = getattr(getattr(update, 'peer', None), 'channel_id', None)
+        if channel_id is None or (not self.watch_all and channel_id not in self.watched):
+            self.filtered_channel += 1
+            return False
+        self.accepted += 1
+        return True
+
+    def reload(self, config_path: str) -> bool:
+        """Re-read the ``filters`` section if the config file changed; return True if it was applied."""
+        mtime = os.stat(config_path).st_mtime
+        if mtime == self._config_mtime:
+            return False
+        with open(config_path, 'r') as file:
+            config = yaml.safe_load(file) or {}
+        self.configure(config.get('filters') or {})
+        self._config_mtime = mtime
+        return True
+
+    async def run_reload(self, config_path: str, interval: float) -> None:
+        """Poll the config file and apply changes to the filter without a restart."""
+        self._config_mtime = os.stat(config_path).st_mtime
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                if await asyncio.to_thread(self.reload, config_path):
+                    logging.info(f"Reloaded update filter: watching "
+                                 f"{'all' if self.watch_all else len(self.watched)} channel(s)")
+            except Exception as e:
+                logging.error(f"Failed to reload update filter from {config_path}: {e}")
+
+    def stats(self) -> Dict[str, int]:
+        """Return accepted and filtered update counters."""
+        return {
+            'accepted': self.accepted,
+            'filtered_type': self.filtered_type,
+            'filtered_channel': self.filtered_channel,
+            'watched_channels': len(self.watched),
+        }
@@ -0,0 +1,131 @@
+import unittest
+from types import SimpleNamespace
+
+from telethon.errors import BroadcastForbiddenError
+
+from benchmarks.fake_client import FakeTelegramClient, make_user
+from src.attribution import ReactionAttribution, UnresolvedUser, UserCache, reaction_for_key
+from src.rate_limiter import RateLimiter
+
+
+async def no_sleep(delay):
+    pass
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class UserlessClient(FakeTelegramClient):
+    """Fake client whose reactor lists come without the user entities."""
+
+    async def __call__(self, request):
+        result = await super().__call__(request)
+        result.users = []
+        return result
+
+
+class BroadcastClient(FakeTelegramClient):
+    """Fake client for a broadcast channel, which does not list its reactors."""
+
+    async def __call__(self, request):
+        self.calls[type(request).__name__] += 1
+        raise BroadcastForbiddenError(request=request)
+
+
+class TestUserCache(unittest.TestCase):
+
+    def test_lru_and_ttl(self):
+        """The least recently used user is evicted first, and users expire after the TTL."""
+        clock = FakeClock()
+        cache = UserCache(max_users=2, ttl=10, clock=clock)
+        cache.put([make_user(1), make_user(2)])
+        cache.get(1)
+        cache.put([make_user(3)])
+
+        self.assertIsNone(cache.get(2))
+        self.assertEqual(cache.get(1).id, 1)
+        clock.now = 10
+        self.assertIsNone(cache.get(1))
+        self.assertEqual(cache.stats()['evictions'], 1)
+
+    def test_min_user_keeps_cached_details(self):
+        """A ``min`` user does not overwrite the full entity already cached."""
+        cache = UserCache()
+        cache.put([make_user(1)])
+        cache.put([SimpleNamespace(id=1, min=True, username=None)])
+
+        self.assertEqual(cache.get(1).username, 'user1')
+
+
+class TestReactionAttribution(unittest.IsolatedAsyncioTestCase):
+
+    async def test_fetches_only_new_reactors(self):
+        """Only ``delta`` of the newest reactors are fetched, a page at a time."""
+        client = FakeTelegramClient(participants=1000)
+        client.reactors[(5, 1)] = {'👍': list(range(300, 0, -1)), '🔥': [7]}
+        attribution = ReactionAttribution(page_size=2)
+
+        reactors = await attribution.attribute(client, 5, 1, [('👍', 3)])
+
+        self.assertEqual([user.id for user in reactors['👍']], [300, 299, 298])
+        self.assertEqual(client.calls['GetMessageReactionsListRequest'], 2)
+        self.assertEqual(client.calls['get_entity'], 0)
+
+    async def test_resolves_missing_users_in_one_batch(self):
+        """Reactors sent without their entities are resolved together, and only once."""
+        client = UserlessClient()
+        client.reactors[(5, 1)] = {'👍': [1, 2], '🔥': [3]}
+        attribution = ReactionAttribution()
+
+        reactors = await attribution.attribute(client, 5, 1, [('👍', 2), ('🔥', 1)])
+        await attribution.attribute(client, 6, 1, [('👍', 1)])  # No reactors on another channel
+        client.reactors[(6, 2)] = {'👍': [3]}
+        again = await attribution.attribute(client, 6, 2, [('👍', 1)])
+
+        self.assertEqual([user.username for user in reactors['👍']], ['user1', 'user2'])
+        self.assertEqual(again['👍'][0].username, 'user3')  # From the cache shared by every channel
+        self.assertEqual(client.calls['get_entity'], 1)
+
+    async def test_unsupported_channel_is_not_asked_again(self):
+        """A channel that hides its reactors is remembered, and its reactions go unattributed."""
+        client = BroadcastClient()
+        attribution = ReactionAttribution(rate_limiter=RateLimiter(global_rate=0, per_chat_rate=0, sleep=no_sleep))
+
+        first = await attribution.attribute(client, 5, 1, [('👍', 1)])
+        requests = client.calls['GetMessageReactionsListRequest']
+        second = await attribution.attribute(client, 5, 2, [('👍', 1)])
+
+        self.assertEqual(first, {'👍': []})
+        self.assertEqual(second, {'👍': []})
+        self.assertEqual(client.calls['GetMessageReactionsListRequest'], requests)
+        self.assertEqual(attribution.stats()['unsupported_channels'], 1)
+
+    async def test_unresolved_user_is_kept(self):
+        """A reactor whose entity cannot be resolved is still reported by ID."""
+        client = UserlessClient()
+        client.reactors[(5, 1)] = {'👍': [9]}
+
+        async def get_entity(entity):
+            raise ValueError("Could not find the input entity")
+
+        client.get_entity = get_entity
+        attribution = ReactionAttribution(rate_limiter=RateLimiter(global_rate=0, per_chat_rate=0, sleep=no_sleep))
+        with self.assertLogs(level='WARNING') as logs:
+            reactors = await attribution.attribute(client, 5, 1, [('👍', 1)])
+
+        self.assertEqual(reactors['👍'], [UnresolvedUser(9)])
+        self.assertEqual(logs.records[0].category, 'attribution')  # Capped by the log sampling
+
+    def test_reaction_for_key(self):
+        self.assertEqual(reaction_for_key('👍').emoticon, '👍')
+        self.assertEqual(reaction_for_key('custom:42').document_id, 42)
+        self.assertIsNone(reaction_for_key('ReactionPaid'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import unittest
+
+from benchmarks.bench_pipeline import percentile, run_pipeline_benchmark
+from benchmarks.bench_startup import run_startup_benchmark, slowest_imports
+from benchmarks.fake_client import reaction_stream
+
+
+class TestBenchmarkHarness(unittest.IsolatedAsyncioTestCase):
+
+    def test_reaction_stream_counts_grow(self):
+        """Every synthetic update raises one count of its message by one."""
+        updates = list(reaction_stream(50, channels=2, messages_per_channel=3))
+
+        self.assertEqual(len(updates), 50)
+        self.assertEqual({update.peer.channel_id for update in updates}, {1000, 1001})
+        self.assertTrue(all(update.reactions.results for update in updates))
+
+    def test_percentile(self):
+        self.assertEqual(percentile([3, 1, 2, 4], 0.5), 3)
+        self.assertEqual(percentile([], 0.99), 0.0)
+
+    async def test_pipeline_benchmark(self):
+        """The main pipeline processes every update and reports its outbound calls."""
+        report = await run_pipeline_benchmark(events=500, channels=5, fetch_user_data=True,
+                                              flood_wait_rate=0.5, flood_wait_seconds=0)
+
+        self.assertEqual(report['processed'], 500)
+        self.assertEqual(report['dropped'], 0)
+        self.assertEqual(report['failed'], 0)
+        self.assertGreater(report['events_per_second'], 0)
+        self.assertLessEqual(report['p50_latency_ms'], report['p99_latency_ms'])
+        # Each update adds one reaction, which costs one reactor lookup whatever the channel size
+        self.assertEqual(report['outbound_calls']['GetMessageReactionsListRequest'], 500)
+        self.assertNotIn('get_entity', report['outbound_calls'])
+        self.assertGreater(report['notifications_sent'], 0)
+        self.assertEqual(report['outbound_calls']['send_message'],
+                         report['notifications_sent'] + report['outbound_calls'].get('flood_wait', 0))
+
+    def test_startup_benchmark(self):
+        """Importing the bot or the API does not import Telethon; it is loaded on the way to ready."""
+        report = run_startup_benchmark(repeat=1)
+
+        self.assertFalse(report['bot']['telethon_imported'])
+        self.assertFalse(report['api']['telethon_imported'])
+        self.assertLess(report['bot']['import_ms'], report['bot']['ready_ms'])
+
+    def test_slowest_imports(self):
+        output = (
+            "import time: self [us] | cumulative | imported package\n"
+            "import time:       300 |        300 |     telethon.errors\n"
+            "import time:       200 |        500 |   telethon\n"
+            "import time:       100 |        100 | yaml\n"
+        )
+        self.assertEqual(slowest_imports(output), [{'package': 'telethon', 'milliseconds': 0.5},
+                                                   {'package': 'yaml', 'milliseconds': 0.1}])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,155 @@
+import asyncio
+import tempfile
+import unittest
+
+from benchmarks.bench_pipeline import benchmark_config
+from benchmarks.fake_client import FakeTelegramClient, make_update
+from src.catch_up import ReactionCatchUp
+from src.reaction_state import ReactionStateStore
+from src.telegram_bot import ReactionBot
+
+
+class SlowClient(FakeTelegramClient):
+    """Fake client whose raw requests take a while, recording how many overlap."""
+
+    in_flight = 0
+    max_in_flight = 0
+
+    async def __call__(self, request):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(0.01)
+            return await super().__call__(request)
+        finally:
+            self.in_flight -= 1
+
+
+class RacingClient(FakeTelegramClient):
+    """Fake client that delivers a newer live update while a catch-up request is in flight."""
+
+    async def __call__(self, request):
+        result = await super().__call__(request)
+        self.reactions[(5, 10)] = {'👍': 6}
+        await self.dispatch(make_update(5, 10, {'👍': 6}))
+        await asyncio.sleep(0.01)  # Let the channel worker process it
+        return result
+
+
+class TestReactionCatchUp(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.client = FakeTelegramClient()
+        self.store = ReactionStateStore()
+        self.processed = []
+
+    async def process(self, replayed):
+        self.processed.append(replayed.update.msg_id)
+
+    async def test_batches_requests(self):
+        """Recent messages are fetched in batches, never more than ``concurrency`` at a time."""
+        client = SlowClient()
+        for message_id in range(1, 301):
+            client.reactions[(5, message_id)] = {'👍': 1}
+
+        catch_up = ReactionCatchUp(client, self.store, self.process, max_messages=250, batch_size=100, concurrency=2)
+        stats = await catch_up.run([5])
+
+        self.assertEqual(stats['requests'], 3)
+        self.assertEqual(client.max_in_flight, 2)
+        self.assertEqual(stats['seeded'], 250)  # The channel was never tracked, so nothing is reported
+        self.assertEqual(self.processed, [])
+        self.assertEqual(self.store.get(5, 51), {'👍': 1})
+        self.assertEqual(self.store.get(5, 50), {})
+
+    async def test_replays_known_messages_and_seeds_forgotten_ones(self):
+        """Known messages go through processing; messages the store forgot are seeded silently."""
+        store = ReactionStateStore(max_messages=2)
+        store.track(5, 0)
+        store.diff(5, 1, {'👍': 1})
+        store.diff(5, 2, {'👍': 1})
+        store.diff(5, 3, {'👍': 1})  # Evicts message 1
+        self.client.reactions = {(5, 1): {'👍': 4}, (5, 3): {'👍': 2}, (5, 4): {'🔥': 1}, (6, 1): {'👍': 1}}
+
+        stats = await ReactionCatchUp(self.client, store, self.process).run([5, 6])
+
+        self.assertEqual(sorted(self.processed), [3, 4])
+        self.assertEqual(stats['seeded'], 2)
+        self.assertEqual(store.get(5, 1), {'👍': 4})
+        self.assertEqual(store.get(6, 1), {'👍': 1})
+
+    async def test_reactions_older_than_tracking_are_seeded(self):
+        """Reactions a message had before its channel was tracked are not reported as new."""
+        self.client.reactions = {(7, 600): {'🔥': 40}, (7, 1000): {'👍': 1}}
+        catch_up = ReactionCatchUp(self.client, self.store, self.process)
+        await catch_up.track(7)  # On the first live update
+        self.store.diff(7, 1000, {'👍': 1})
+        self.client.reactions[(7, 1000)] = {'👍': 2}
+
+        stats = await catch_up.run([7])
+
+        self.assertEqual(self.processed, [1000])
+        self.assertEqual(stats['seeded'], 1)
+        self.assertEqual(self.store.get(7, 600), {'🔥': 40})
+
+
+class TestBotCatchUp(unittest.IsolatedAsyncioTestCase):
+
+    async def test_notifies_reactions_missed_while_down(self):
+        """After a restart only the reactions added during the downtime are reported."""
+        with tempfile.TemporaryDirectory() as directory:
+            config = benchmark_config(directory, batch_window=0.01)
+            config['filters'] = {'watched_channels': [5]}
+            config['catch_up'] = {'enabled': True}
+            store = ReactionStateStore()
+            store.track(5, 9)
+            store.diff(5, 10, {'👍': 3})
+            store.save(config['reaction_state']['snapshot_path'])
+
+            client = FakeTelegramClient()
+            client.reactions = {(5, 10): {'👍': 5}, (5, 11): {'🔥': 1}}
+            bot = ReactionBot(client, config, config_path=None)
+            await bot.start()
+            await bot._tasks[-1]
+            await bot.stop()
+
+        self.assertEqual(client.sent, [(42, "👍 +2 on msg 10 in channel 5\n🔥 +1 on msg 11 in channel 5")])
+
+    async def test_stale_replay_is_skipped(self):
+        """Counts fetched before a live update was processed do not roll the stored state back."""
+        with tempfile.TemporaryDirectory() as directory:
+            config = benchmark_config(directory, batch_window=0.01)
+            config['filters'] = {'watched_channels': [5]}
+            config['catch_up'] = {'enabled': True}
+            store = ReactionStateStore()
+            store.track(5, 9)
+            store.diff(5, 10, {'👍': 3})
+            store.save(config['reaction_state']['snapshot_path'])
+
+            client = RacingClient()
+            client.reactions = {(5, 10): {'👍': 5}}
+            bot = ReactionBot(client, config, config_path=None)
+            await bot.start()
+            await bot._tasks[-1]
+            await bot.stop()
+
+        self.assertEqual(client.sent, [(42, "👍 +3 on msg 10 in channel 5")])
+        self.assertEqual(bot.state_store.get(5, 10), {'👍': 6})
+
+    async def test_first_live_update_tracks_the_channel(self):
+        """A channel first seen live is tracked from its latest message at that time."""
+        with tempfile.TemporaryDirectory() as directory:
+            config = benchmark_config(directory)
+            client = FakeTelegramClient()
+            client.reactions = {(7, 600): {'🔥': 40}}
+            bot = ReactionBot(client, config, config_path=None)
+            await bot.start()
+            await client.dispatch(make_update(7, 1000, {'👍': 1}))
+            await bot.stop()
+
+        self.assertFalse(bot.state_store.is_known(7, 600))
+        self.assertTrue(bot.state_store.is_known(7, 1001))
+
+
+if __name__ == '__main__':
+    unittest.main()
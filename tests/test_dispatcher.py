@@ -0,0 +1,139 @@
+import asyncio
+import threading
+import unittest
+
+from src.dispatcher import UpdateDispatcher
+
+
+class TestUpdateDispatcher(unittest.IsolatedAsyncioTestCase):
+
+    async def test_preserves_order_within_channel(self):
+        """Updates of one channel are processed in submission order."""
+        processed = []
+
+        async def process(update):
+            await asyncio.sleep(0)
+            processed.append(update)
+
+        dispatcher = UpdateDispatcher(process, workers=4, batch_size=2)
+        dispatcher.start()
+        for i in range(10):
+            dispatcher.submit(1, ('a', i))
+            dispatcher.submit(2, ('b', i))
+        await dispatcher.close()
+
+        self.assertEqual([i for name, i in processed if name == 'a'], list(range(10)))
+        self.assertEqual([i for name, i in processed if name == 'b'], list(range(10)))
+        self.assertEqual(dispatcher.stats()['processed'], 20)
+        self.assertEqual(dispatcher.stats()['channels'], 0)
+
+    async def test_slow_channel_does_not_block_others(self):
+        """A stuck channel leaves the other workers free."""
+        release = asyncio.Event()
+        processed = []
+
+        async def process(update):
+            if update == 'slow':
+                await release.wait()
+            processed.append(update)
+
+        dispatcher = UpdateDispatcher(process, workers=2)
+        dispatcher.start()
+        dispatcher.submit(1, 'slow')
+        dispatcher.submit(2, 'fast')
+        await asyncio.sleep(0.01)
+
+        self.assertEqual(processed, ['fast'])
+        self.assertEqual(dispatcher.channel_stats()[1]['pending'], 0)
+        release.set()
+        await dispatcher.close()
+        self.assertEqual(processed, ['fast', 'slow'])
+
+    async def test_drop_oldest_policy(self):
+        """A full channel queue discards its oldest pending update."""
+        processed = []
+
+        async def process(update):
+            processed.append(update)
+
+        dispatcher = UpdateDispatcher(process, max_per_channel=2)
+        for i in range(4):
+            self.assertTrue(dispatcher.submit(1, i))
+        dispatcher.start()
+        await dispatcher.close()
+
+        self.assertEqual(processed, [2, 3])
+        self.assertEqual(dispatcher.stats()['dropped'], 2)
+
+    async def test_drop_newest_policy(self):
+        """A full dispatcher rejects incoming updates under drop_newest."""
+        async def process(update):
+            pass
+
+        dispatcher = UpdateDispatcher(process, max_total=2, overflow_policy='drop_newest')
+        self.assertTrue(dispatcher.submit(1, 'a'))
+        self.assertTrue(dispatcher.submit(2, 'b'))
+        self.assertFalse(dispatcher.submit(3, 'c'))
+
+        self.assertEqual(dispatcher.stats()['pending'], 2)
+        self.assertNotIn(3, dispatcher.channel_stats())
+
+    async def test_failures_do_not_stop_workers(self):
+        """An exception while processing is counted and the worker continues."""
+        processed = []
+
+        async def process(update):
+            if update == 'bad':
+                raise RuntimeError("boom")
+            processed.append(update)
+
+        dispatcher = UpdateDispatcher(process, workers=1)
+        dispatcher.start()
+        dispatcher.submit(1, 'bad')
+        dispatcher.submit(1, 'good')
+        with self.assertLogs(level='ERROR') as logs:
+            await dispatcher.close()
+
+        self.assertEqual(processed, ['good'])
+        self.assertEqual(dispatcher.stats()['failed'], 1)
+        self.assertEqual(logs.records[0].category, 'dispatch')  # Capped by the log sampling
+
+    async def test_channel_stats_from_another_thread(self):
+        """Metrics scrapes can read the channel stats while the workers change the queues."""
+        async def process(update):
+            await asyncio.sleep(0)
+
+        dispatcher = UpdateDispatcher(process, workers=8, batch_size=1)
+        dispatcher.start()
+        stop = threading.Event()
+        errors = []
+
+        def scrape():
+            while not stop.is_set():
+                try:
+                    dispatcher.channel_stats()
+                except Exception as e:
+                    errors.append(e)
+
+        scraper = threading.Thread(target=scrape)
+        scraper.start()
+        try:
+            for round_ in range(50):
+                for channel_id in range(200):
+                    dispatcher.submit(channel_id, round_)
+                await asyncio.sleep(0)
+            await dispatcher.close()
+        finally:
+            stop.set()
+            scraper.join()
+
+        self.assertEqual(errors, [])
+
+    def test_rejects_unknown_policy(self):
+        """An unknown overflow policy is a configuration error."""
+        with self.assertRaises(ValueError):
+            UpdateDispatcher(lambda update: None, overflow_policy='random')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,179 @@
+import importlib
+import os
+import sqlite3
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+from src.event_store import HOUR, MergedEventStore, ReactionEventStore
+
+
+class TestReactionEventStore(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'reactions.db')
+        self.store = ReactionEventStore(self.path, batch_size=100, flush_interval=0.01)
+
+    def tearDown(self):
+        self.store.close()
+        self.directory.cleanup()
+
+    def ingest(self, events):
+        self.store.start()
+        for event in events:
+            self.store.append(*event)
+        self.store.close()
+
+    def test_top_messages(self):
+        """Messages are ranked by their net reaction change."""
+        now = time.time()
+        self.ingest([
+            (1, 10, '👍', 3, now),
+            (1, 10, '🔥', 1, now),
+            (1, 11, '👍', 5, now),
+            (2, 10, '👍', 2, now),
+            (1, 11, '👍', -2, now),
+            (1, 12, '👍', 9, now - 30 * 24 * HOUR),
+        ])
+
+        top = self.store.top_messages(now - 24 * HOUR, limit=2)
+        self.assertEqual(top, [
+            {'channel_id': 1, 'message_id': 10, 'total': 4},
+            {'channel_id': 1, 'message_id': 11, 'total': 3},
+        ])
+        self.assertEqual(self.store.top_messages(now - 24 * HOUR, channel_id=2),
+                         [{'channel_id': 2, 'message_id': 10, 'total': 2}])
+
+    def test_compaction_preserves_totals(self):
+        """Compacting raw events into hourly totals does not change query results."""
+        hour = int(time.time() // HOUR) * HOUR - 5 * HOUR
+        self.ingest([(1, 10, '👍', 1, hour + offset) for offset in range(0, 3 * HOUR, 60)])
+        before = self.store.time_series(1, hour, hour + 3 * HOUR)
+
+        removed = self.store.compact(hour + 2 * HOUR + 30)
+        after = self.store.time_series(1, hour, hour + 3 * HOUR)
+
+        self.assertEqual(removed, 120)
+        self.assertEqual(before, after)
+        self.assertEqual(after, [{'bucket': hour + i * HOUR, 'emoji': '👍', 'total': 60} for i in range(3)])
+
+    def test_time_series_rejects_partial_hour_buckets(self):
+        """Buckets that do not line up with hourly aggregates are rejected."""
+        with self.assertRaises(ValueError):
+            self.store.time_series(1, 0, bucket=60)
+
+    def test_full_buffer_drops_events(self):
+        """append never blocks: events beyond the buffer size are dropped and counted."""
+        store = ReactionEventStore(self.path, max_buffer=2)
+        results = [store.append(1, 1, '👍', 1) for _ in range(3)]
+
+        self.assertEqual(results, [True, True, False])
+        self.assertEqual(store.stats()['dropped'], 1)
+
+    def test_ingestion_keeps_up(self):
+        """Tens of thousands of events are appended and written well within a few seconds."""
+        now = time.time()
+        started = time.perf_counter()
+        self.ingest([(i % 50, i % 1000, '👍', 1, now) for i in range(50000)])
+        elapsed = time.perf_counter() - started
+
+        self.assertEqual(self.store.stats()['written'], 50000)
+        self.assertLess(elapsed, 5)
+
+    def test_writer_survives_a_locked_database(self):
+        """Events written while another connection holds the database are kept and written afterwards."""
+        store = ReactionEventStore(self.path, flush_interval=0.01, busy_timeout=0.05)
+        store.start()
+        store.append(1, 1, '👍', 1)
+        time.sleep(0.1)
+
+        blocker = sqlite3.connect(self.path)
+        blocker.execute('BEGIN IMMEDIATE')
+        store.append(1, 2, '👍', 1)
+        time.sleep(0.3)
+        self.assertTrue(store._thread.is_alive())
+        blocker.rollback()
+        blocker.close()
+        store.append(1, 3, '👍', 1)
+        store.close()
+
+        self.assertEqual(store.stats()['written'], 3)
+        self.assertGreater(store.stats()['write_errors'], 0)
+
+
+class TestMergedEventStore(unittest.TestCase):
+
+    def test_sums_across_stores(self):
+        """A message whose events are split between shard databases is ranked on its total."""
+        now = time.time()
+        with tempfile.TemporaryDirectory() as directory:
+            stores = []
+            for name, events in (('a', [(1, 10, '👍', 3, now), (1, 11, '👍', 4, now)]),
+                                 ('b', [(1, 10, '👍', 2, now), (2, 20, '🔥', 1, now)])):
+                store = ReactionEventStore(os.path.join(directory, f'reactions.{name}.db'), flush_interval=0.01)
+                store.start()
+                for event in events:
+                    store.append(*event)
+                store.close()
+                stores.append(store)
+            stores.append(ReactionEventStore(os.path.join(directory, 'missing.db')))
+            merged = MergedEventStore(stores)
+
+            top = merged.top_messages(now - HOUR, limit=2)
+            series = merged.time_series(1, now - HOUR, message_id=10)
+
+        self.assertEqual(top, [
+            {'channel_id': 1, 'message_id': 10, 'total': 5},
+            {'channel_id': 1, 'message_id': 11, 'total': 4},
+        ])
+        self.assertEqual([(point['emoji'], point['total']) for point in series], [('👍', 5)])
+
+
+class TestReactionRoutes(unittest.TestCase):
+
+    def test_top_and_timeseries_routes(self):
+        """The API serves top-N and time-series queries from the event store."""
+        app_module = importlib.import_module('api.app')
+
+        with tempfile.TemporaryDirectory() as directory:
+            store = ReactionEventStore(os.path.join(directory, 'reactions.db'), flush_interval=0.01)
+            store.start()
+            store.append(5, 42, '👍', 3)
+            store.close()
+
+            with patch.object(app_module, 'event_store', store):
+                client = app_module.app.test_client()
+                top = client.get('/reactions/top?hours=1').get_json()
+                series = client.get('/reactions/timeseries?channel_id=5&hours=1').get_json()
+                missing = client.get('/reactions/timeseries')
+
+        self.assertEqual(top['messages'], [{'channel_id': 5, 'message_id': 42, 'total': 3}])
+        self.assertEqual([point['total'] for point in series['points']], [3])
+        self.assertEqual(missing.status_code, 400)
+
+    def test_routes_read_every_shard(self):
+        """With sharding configured, the routes query the database of each shard."""
+        app_module = importlib.import_module('api.app')
+
+        with tempfile.TemporaryDirectory() as directory:
+            for name in ('a', 'b'):
+                store = ReactionEventStore(os.path.join(directory, f'reactions.{name}.db'), flush_interval=0.01)
+                store.start()
+                store.append(5, 42, '👍', 2)
+                store.close()
+            config_path = os.path.join(directory, 'config.yaml')
+            with open(config_path, 'w') as file:
+                file.write(f"event_store:\n  path: {os.path.join(directory, 'reactions.db')}\n"
+                           "sharding:\n  sessions: [a, b]\n")
+
+            with patch.object(app_module, 'DEFAULT_CONFIG_PATH', config_path), \
+                    patch.object(app_module, 'event_store', None):
+                top = app_module.app.test_client().get('/reactions/top?hours=1').get_json()
+
+        self.assertEqual(top['messages'], [{'channel_id': 5, 'message_id': 42, 'total': 4}])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+import asyncio
+import importlib
+import os
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+
+from benchmarks.bench_pipeline import benchmark_config
+from benchmarks.fake_client import FakeTelegramClient, reaction_stream
+from src.lifecycle import BotLifecycle
+
+
+class TestBotLifecycle(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.config = benchmark_config(self.directory.name, batch_window=60)
+        self.config['telegram'].update(session_name='test', api_id=1, api_hash='hash')
+        self.config['logging'] = {'log_file': os.path.join(self.directory.name, 'bot.log'), 'level': 'INFO'}
+        self.clients = []
+        self.lifecycle = BotLifecycle('config.yaml', config_loader=lambda path: self.config,
+                                      client_factory=self.create_client)
+
+    def tearDown(self):
+        self.lifecycle.shutdown()
+        self.directory.cleanup()
+
+    def create_client(self, config):
+        client = FakeTelegramClient(linger=True)
+        self.clients.append(client)
+        return client
+
+    def test_start_stop_reuses_loop_and_client(self):
+        """Restarting reuses the loop thread and the client instead of creating new ones."""
+        self.assertTrue(self.lifecycle.start().result(5))
+        self.assertFalse(self.lifecycle.start().result(5))
+        self.assertTrue(self.lifecycle.running)
+        thread = self.lifecycle._thread
+        threads = threading.active_count()
+
+        self.assertTrue(self.lifecycle.stop().result(5))
+        self.assertFalse(self.clients[0].is_connected())
+        self.assertTrue(self.lifecycle.start().result(5))
+
+        self.assertIs(self.lifecycle._thread, thread)
+        self.assertEqual(len(self.clients), 1)
+        self.assertTrue(self.clients[0].is_connected())
+        self.assertEqual(len(self.clients[0]._handlers), 1)
+        self.assertLessEqual(threading.active_count(), threads)
+        self.assertEqual(self.lifecycle.status()['starts'], 2)
+
+    def test_stop_drains_notifications_before_disconnecting(self):
+        """Notifications still waiting in the batch window are sent on stop."""
+        self.lifecycle.start().result(5)
+        client = self.clients[0]
+        for update in reaction_stream(20, channels=2):
+            asyncio.run_coroutine_threadsafe(client.dispatch(update), self.lifecycle._loop).result(5)
+        self.assertFalse(client.sent)
+
+        self.lifecycle.stop().result(5)
+
+        self.assertTrue(client.sent)
+        self.assertFalse(client.is_connected())
+        self.assertEqual(self.lifecycle.state, 'stopped')
+
+    def test_reload_keeps_client_unless_session_changes(self):
+        """Reload applies the new config and only replaces the client when the session changes."""
+        self.lifecycle.start().result(5)
+        self.config['notifications']['max_users'] = 1
+        self.assertTrue(self.lifecycle.reload().result(5))
+        self.assertEqual(len(self.clients), 1)
+        self.assertEqual(self.lifecycle.bot.notifier.max_users, 1)
+
+        self.config['telegram']['session_name'] = 'other'
+        self.lifecycle.reload().result(5)
+        self.assertEqual(len(self.clients), 2)
+        self.assertFalse(self.clients[0].is_connected())
+        self.assertTrue(self.lifecycle.running)
+
+    def test_failed_start_is_reported(self):
+        """A failed start leaves the bot stopped and shows the error in the status."""
+        self.config['telegram'].pop('session_name')
+
+        with self.assertRaises(KeyError):
+            self.lifecycle.start().result(5)
+        self.assertEqual(self.lifecycle.status()['state'], 'stopped')
+        self.assertIn('session_name', self.lifecycle.status()['last_error'])
+
+
+class TestLifecycleRoutes(unittest.TestCase):
+
+    def test_status_reflects_lifecycle(self):
+        app_module = importlib.import_module('api.app')
+        client = app_module.app.test_client()
+
+        self.assertFalse(client.get('/status').get_json()['bot_running'])
+        self.assertEqual(client.post('/stop-bot').status_code, 200)
+        with patch.object(app_module.lifecycle, 'state', 'running'):
+            self.assertTrue(client.get('/status').get_json()['bot_running'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import json
+import logging
+import os
+import tempfile
+import unittest
+from logging.handlers import QueueHandler
+
+from src.log_pipeline import JsonFormatter, SamplingFilter
+from src.telegram_bot import setup_logging, shutdown_logging
+
+
+def make_record(message, **extra):
+    record = logging.LogRecord('bot', logging.INFO, __file__, 1, message, None, None)
+    record.__dict__.update(extra)
+    return record
+
+
+class TestLogPipeline(unittest.TestCase):
+
+    def test_json_formatter_includes_structured_fields(self):
+        """JSON lines carry the message and any structured fields."""
+        line = JsonFormatter().format(make_record("sent", channel_id=5, emoji='👍', latency=0.25))
+        entry = json.loads(line)
+
+        self.assertEqual(entry['message'], "sent")
+        self.assertEqual(entry['level'], 'INFO')
+        self.assertEqual(entry['channel_id'], 5)
+        self.assertEqual(entry['emoji'], '👍')
+        self.assertEqual(entry['latency'], 0.25)
+        self.assertNotIn('message_id', entry)
+
+    def test_sampling_caps_category_rate(self):
+        """Records over a category's cap are dropped and reported on the next one let through."""
+        now = [0.0]
+        sampling = SamplingFilter({'send': 2}, clock=lambda: now[0])
+
+        results = [sampling.filter(make_record("sent", category='send')) for _ in range(5)]
+        self.assertEqual(results, [True, True, False, False, False])
+        self.assertTrue(sampling.filter(make_record("other")))
+
+        now[0] = 1.0
+        record = make_record("sent", category='send')
+        self.assertTrue(sampling.filter(record))
+        self.assertEqual(record.getMessage(), "sent (3 similar send records suppressed)")
+        self.assertEqual(sampling.dropped, 3)
+
+    def test_setup_logging_writes_through_queue(self):
+        """Records reach the log file through a single queue handler, even after repeated setup."""
+        with tempfile.TemporaryDirectory() as directory:
+            log_file = os.path.join(directory, 'bot.log')
+            setup_logging(log_file, 'INFO')
+            setup_logging(log_file, 'INFO', 'json')
+            try:
+                logging.info("hello", extra={'channel_id': 5})
+            finally:
+                shutdown_logging()
+
+            with open(log_file) as file:
+                lines = [json.loads(line) for line in file if line.startswith('{')]
+
+        self.assertEqual(len(lines), 1)
+        self.assertFalse(any(isinstance(handler, QueueHandler) for handler in logging.getLogger().handlers))
+        self.assertEqual(lines[0]['message'], "hello")
+        self.assertEqual(lines[0]['channel_id'], 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import unittest
+
+from src.metrics import Registry
+
+
+class TestMetrics(unittest.TestCase):
+
+    def test_counter_and_gauge_exposition(self):
+        """Counters and gauges render with HELP, TYPE and labelled samples."""
+        registry = Registry()
+        counter = registry.counter('bot_events_total', 'Events seen.')
+        gauge = registry.gauge('bot_depth', 'Queue depth.')
+        counter.inc()
+        counter.inc(2, kind='a"b')
+        gauge.set(3.5)
+
+        self.assertEqual(registry.render(), (
+            '# HELP bot_events_total Events seen.\n'
+            '# TYPE bot_events_total counter\n'
+            'bot_events_total 1\n'
+            'bot_events_total{kind="a\\"b"} 2\n'
+            '# HELP bot_depth Queue depth.\n'
+            '# TYPE bot_depth gauge\n'
+            'bot_depth 3.5\n'
+        ))
+
+    def test_histogram_buckets_are_cumulative(self):
+        """Histogram buckets are cumulative and include +Inf, sum and count."""
+        registry = Registry()
+        histogram = registry.histogram('bot_latency_seconds', 'Latency.', buckets=(0.1, 1))
+        for value in (0.05, 0.1, 0.5, 3):
+            histogram.observe(value)
+
+        lines = registry.render().splitlines()
+        self.assertIn('bot_latency_seconds_bucket{le="0.1"} 2', lines)
+        self.assertIn('bot_latency_seconds_bucket{le="1"} 3', lines)
+        self.assertIn('bot_latency_seconds_bucket{le="+Inf"} 4', lines)
+        self.assertIn('bot_latency_seconds_sum 3.65', lines)
+        self.assertIn('bot_latency_seconds_count 4', lines)
+
+    def test_callbacks_run_only_on_render(self):
+        """Callback metrics are evaluated at scrape time, and re-registering replaces them."""
+        registry = Registry()
+        calls = []
+
+        def depth():
+            calls.append(1)
+            return [({'channel_id': 5}, 2)]
+
+        registry.callback('bot_channel_depth', 'Depth.', lambda: 0)
+        registry.callback('bot_channel_depth', 'Depth.', depth)
+        self.assertEqual(calls, [])
+
+        self.assertIn('bot_channel_depth{channel_id="5"} 2', registry.render().splitlines())
+        self.assertEqual(calls, [1])
+
+
+class TestMetricsRoute(unittest.TestCase):
+
+    def test_metrics_route(self):
+        """/metrics serves the text exposition format."""
+        from api.app import app
+
+        response = app.test_client().get('/metrics')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content_type.startswith('text/plain; version=0.0.4'))
+        self.assertIn('reaction_bot_running 0', response.get_data(as_text=True).splitlines())
+
+
+if __name__ == '__main__':
+    unittest.main()
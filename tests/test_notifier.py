@@ -0,0 +1,65 @@
+import asyncio
+import unittest
+
+from src.notifier import MAX_MESSAGE_LENGTH, NotificationQueue, ReactionNotice
+
+
+class TestNotificationQueue(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.sent = []
+
+    async def send(self, text):
+        self.sent.append(text)
+
+    async def test_coalesces_notices_per_message(self):
+        """Notices within the window become one summary line per message."""
+        queue = NotificationQueue(self.send, window=0.05)
+        queue.start()
+        for _ in range(37):
+            await queue.submit(ReactionNotice(5, 1234, '👍', 1, 40))
+        await queue.submit(ReactionNotice(5, 1234, '🔥', 12, 12))
+        await queue.submit(ReactionNotice(5, 99, '👍', 2, 2, ('alice (ID: 1)',)))
+        await queue.close()
+
+        self.assertEqual(self.sent, [
+            "👍 +37, 🔥 +12 on msg 1234 in channel 5\n"
+            "👍 +2 on msg 99 in channel 5 (by alice (ID: 1))"
+        ])
+        self.assertEqual(queue.stats()['flushes'], 1)
+        self.assertEqual(queue.stats()['notices'], 39)
+
+    async def test_flushes_on_batch_size(self):
+        """A full batch is flushed before the window expires."""
+        queue = NotificationQueue(self.send, window=60, max_batch=2)
+        queue.start()
+        await queue.submit(ReactionNotice(5, 1, '👍', 1, 1))
+        await queue.submit(ReactionNotice(5, 2, '👍', 1, 1))
+        await asyncio.sleep(0.01)
+
+        self.assertEqual(len(self.sent), 1)
+        await queue.close()
+
+    async def test_submit_applies_backpressure(self):
+        """Submitting to a full queue waits until the consumer makes room."""
+        queue = NotificationQueue(self.send, max_queue=1)
+        await queue.submit(ReactionNotice(5, 1, '👍', 1, 1))
+
+        with self.assertRaises(asyncio.TimeoutError):
+            await asyncio.wait_for(queue.submit(ReactionNotice(5, 2, '👍', 1, 1)), 0.01)
+        self.assertEqual(queue.depth, 1)
+
+    async def test_long_summaries_are_split(self):
+        """Summaries never exceed Telegram's message length limit."""
+        queue = NotificationQueue(self.send, window=0.05, max_batch=1000, max_queue=0)
+        queue.start()
+        for message_id in range(500):
+            await queue.submit(ReactionNotice(5, message_id, '👍', 1, 1))
+        await queue.close()
+
+        self.assertGreater(len(self.sent), 1)
+        self.assertTrue(all(len(text) <= MAX_MESSAGE_LENGTH for text in self.sent))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,129 @@
+import unittest
+
+from telethon.errors import FloodWaitError
+
+from src.rate_limiter import RateLimiter, method_key
+from src.telegram_bot import send_message_with_retry
+
+
+class FakeTime:
+    """Clock and sleep that advance virtual time instantly."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def clock(self):
+        return self.now
+
+    async def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class FakeClient:
+    """Client whose ``send_message`` raises the queued errors before succeeding."""
+
+    def __init__(self, errors=()):
+        self.errors = list(errors)
+        self.sent = []
+
+    async def send_message(self, chat_id, text):
+        if self.errors:
+            raise self.errors.pop(0)
+        self.sent.append((chat_id, text))
+
+
+def flood_wait(seconds):
+    return FloodWaitError(request=None, capture=seconds)
+
+
+class TestRateLimiter(unittest.IsolatedAsyncioTestCase):
+
+    def make_limiter(self, fake_time, **kwargs):
+        return RateLimiter(clock=fake_time.clock, sleep=fake_time.sleep, jitter=lambda: 0.0, **kwargs)
+
+    async def test_per_chat_bucket_throttles(self):
+        """Calls beyond the burst wait for the chat's bucket to refill."""
+        fake_time = FakeTime()
+        limiter = self.make_limiter(fake_time, per_chat_rate=1, per_chat_burst=2)
+
+        for _ in range(4):
+            await limiter.acquire(1)
+
+        self.assertAlmostEqual(fake_time.now, 2.0)
+        self.assertEqual(limiter.stats()['throttled'], 2)
+
+    async def test_chats_do_not_share_buckets(self):
+        """A busy chat does not slow down another chat."""
+        fake_time = FakeTime()
+        limiter = self.make_limiter(fake_time, per_chat_rate=1, per_chat_burst=1)
+
+        await limiter.acquire(1)
+        await limiter.acquire(2)
+
+        self.assertEqual(fake_time.now, 0.0)
+
+    async def test_flood_wait_pauses_only_affected_chat(self):
+        """A FloodWait delays the retry to that chat by the requested seconds."""
+        fake_time = FakeTime()
+        limiter = self.make_limiter(fake_time, per_chat_rate=0)
+        client = FakeClient([flood_wait(7)])
+
+        await send_message_with_retry(client, 1, "hello", retries=3, delay=1, rate_limiter=limiter)
+        self.assertEqual(fake_time.now, 7.0)
+        await send_message_with_retry(client, 2, "other", retries=3, delay=1, rate_limiter=limiter)
+
+        self.assertEqual(fake_time.now, 7.0)
+        self.assertEqual(client.sent, [(1, "hello"), (2, "other")])
+        self.assertEqual(limiter.stats()['flood_waits'], 1)
+        self.assertEqual(limiter.stats()['retried'], 1)
+
+    async def test_flood_wait_on_a_method_does_not_pause_sends(self):
+        """A FloodWait on a call keyed by its method pauses that method, not the global bucket."""
+        fake_time = FakeTime()
+        limiter = self.make_limiter(fake_time, per_chat_rate=1, per_chat_burst=1)
+        key = method_key('GetMessageReactionsListRequest')
+
+        async def lookup():
+            raise flood_wait(30)
+
+        with self.assertRaises(FloodWaitError):
+            await limiter.call(key, lookup, attempts=1)
+        await limiter.acquire(42)  # An owner send goes out at once
+        self.assertEqual(fake_time.now, 0.0)
+        for _ in range(3):
+            await limiter.acquire(method_key('GetUsersRequest'))  # Method buckets are not rate limited
+        self.assertEqual(fake_time.now, 0.0)
+        await limiter.acquire(key)
+
+        self.assertEqual(fake_time.now, 30.0)
+        self.assertEqual(limiter.stats()['flood_waits'], 1)
+
+    async def test_exponential_backoff_and_drop(self):
+        """Generic failures back off exponentially and are dropped after the last attempt."""
+        fake_time = FakeTime()
+        limiter = self.make_limiter(fake_time, per_chat_rate=0)
+        client = FakeClient([Exception("Network error")] * 3)
+
+        await send_message_with_retry(client, 1, "hello", retries=3, delay=2, rate_limiter=limiter)
+
+        self.assertEqual(fake_time.sleeps, [2, 4])
+        self.assertEqual(client.sent, [])
+        self.assertEqual(limiter.stats()['dropped'], 1)
+
+    async def test_long_flood_wait_is_dropped(self):
+        """A FloodWait longer than max_flood_wait is not waited out."""
+        fake_time = FakeTime()
+        limiter = self.make_limiter(fake_time, max_flood_wait=60)
+        client = FakeClient([flood_wait(3600)])
+
+        with self.assertRaises(FloodWaitError):
+            await limiter.call(1, lambda: client.send_message(1, "hi"))
+
+        self.assertEqual(fake_time.now, 0.0)
+        self.assertEqual(limiter.stats()['dropped'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+import os
+import tempfile
+import unittest
+
+from telethon.tl.types import ReactionCount, ReactionCustomEmoji, ReactionEmoji
+
+from src.reaction_state import ReactionStateStore, reaction_counts, reaction_key
+
+
+class TestReactionState(unittest.TestCase):
+
+    def test_reaction_key(self):
+        """Emoji and custom emoji reactions map to stable keys."""
+        self.assertEqual(reaction_key(ReactionEmoji(emoticon='👍')), '👍')
+        self.assertEqual(reaction_key(ReactionCustomEmoji(document_id=99)), 'custom:99')
+
+    def test_diff_reports_only_changes(self):
+        """Re-sent aggregates produce no deltas; changed emojis do."""
+        store = ReactionStateStore()
+        counts = reaction_counts([
+            ReactionCount(reaction=ReactionEmoji(emoticon='👍'), count=3),
+            ReactionCount(reaction=ReactionEmoji(emoticon='🔥'), count=1),
+        ])
+
+        self.assertEqual(store.diff(1, 10, counts), {'👍': 3, '🔥': 1})
+        self.assertEqual(store.diff(1, 10, counts), {})
+        self.assertEqual(store.diff(1, 10, {'👍': 5}), {'👍': 2, '🔥': -1})
+
+    def test_eviction_bounds_memory(self):
+        """The least recently updated message is evicted first."""
+        store = ReactionStateStore(max_messages=2)
+        store.diff(1, 1, {'👍': 1})
+        store.diff(1, 2, {'👍': 1})
+        store.diff(1, 1, {'👍': 2})
+        store.diff(1, 3, {'👍': 1})
+
+        self.assertEqual(len(store), 2)
+        self.assertEqual(store.get(1, 2), {})
+        self.assertEqual(store.get(1, 1), {'👍': 2})
+
+    def test_snapshot_round_trip(self):
+        """Counts survive a save and load."""
+        store = ReactionStateStore()
+        store.diff(1, 10, {'👍': 3})
+        store.diff(2, 20, {'custom:99': 1})
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'state', 'reactions.json.gz')
+            store.save(path)
+            restored = ReactionStateStore()
+            restored.load(path)
+
+        self.assertEqual(restored.get(1, 10), {'👍': 3})
+        self.assertEqual(restored.get(2, 20), {'custom:99': 1})
+        self.assertEqual(restored.diff(1, 10, {'👍': 3}), {})
+
+    def test_marks_tell_unreacted_from_forgotten_messages(self):
+        """Messages between the eviction and high-water marks without counts had no reactions."""
+        store = ReactionStateStore(max_messages=2)
+        store.track(1, 5)
+        for message_id in (10, 20, 30):
+            store.diff(1, message_id, {'👍': 1})
+
+        self.assertEqual(store.high_water_mark(1), 30)
+        self.assertFalse(store.is_known(1, 10))
+        self.assertTrue(store.is_known(1, 15))
+        self.assertTrue(store.is_known(1, 40))
+        self.assertFalse(store.is_known(2, 1))
+
+    def test_messages_before_tracking_are_unknown(self):
+        """Reactions on messages older than the baseline may predate the bot."""
+        store = ReactionStateStore()
+        store.track(7, 1005)
+        store.diff(7, 1000, {'👍': 1})
+        store.track(7, 2000)  # Already tracked: the baseline stays
+
+        self.assertTrue(store.is_known(7, 1000))
+        self.assertFalse(store.is_known(7, 600))
+        self.assertFalse(store.is_known(7, 1005))
+        self.assertTrue(store.is_known(7, 1006))
+
+    def test_marks_survive_snapshots(self):
+        store = ReactionStateStore(max_messages=1)
+        store.track(1, 5)
+        store.track(2, 50)
+        store.diff(1, 10, {'👍': 1})
+        store.diff(1, 20, {'👍': 1})
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'reactions.json.gz')
+            store.save(path)
+            restored = ReactionStateStore()
+            restored.load(path)
+
+        self.assertEqual(sorted(restored.channels()), [1, 2])
+        self.assertFalse(restored.is_known(1, 10))
+        self.assertTrue(restored.is_known(1, 15))
+        self.assertFalse(restored.is_known(2, 50))
+        self.assertTrue(restored.is_known(2, 51))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,45 @@
+import os
+import unittest
+from unittest.mock import patch
+
+from src.settings import BotSettings
+from src.telegram_bot import load_config
+
+
+class TestBotSettings(unittest.TestCase):
+
+    def config(self):
+        return {
+            'telegram': {'owner_id': '42'},
+            'advanced_settings': {'max_reactions_per_message': 100, 'fetch_user_data': True},
+            'notifications': {'retry_attempts': 3, 'retry_delay': 2},
+        }
+
+    def test_parses_hot_path_settings(self):
+        """Values are converted to their types once."""
+        settings = BotSettings.from_config(self.config())
+
+        self.assertEqual(settings, BotSettings(42, 100, True, 3, 2.0))
+
+    def test_rejects_missing_and_invalid_settings(self):
+        config = self.config()
+        del config['advanced_settings']['fetch_user_data']
+        with self.assertRaisesRegex(ValueError, 'fetch_user_data'):
+            BotSettings.from_config(config)
+
+        config = self.config()
+        config['notifications']['retry_attempts'] = 0
+        with self.assertRaisesRegex(ValueError, 'retry_attempts'):
+            BotSettings.from_config(config)
+
+    def test_load_config_names_missing_env_vars(self):
+        """Missing credentials are reported by name instead of failing on int(None)."""
+        environment = {name: value for name, value in os.environ.items() if name != 'OWNER_USER_ID'}
+        environment.update(TELEGRAM_API_ID='1', TELEGRAM_API_HASH='hash', TELEGRAM_BOT_TOKEN='token')
+        with patch.dict(os.environ, environment, clear=True), patch('dotenv.load_dotenv'):
+            with self.assertRaisesRegex(ValueError, 'OWNER_USER_ID'):
+                load_config('config/config.yaml')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,287 @@
+import asyncio
+import queue
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from benchmarks.bench_pipeline import benchmark_config
+from benchmarks.fake_client import FakeTelegramClient, make_update
+from src.notifier import NotificationQueue, ReactionNotice
+from src.reaction_state import ReactionStateStore
+from src.settings import BotSettings
+from src.sharding import HashRing, NotificationDedup, ShardManager, ShardSupervisor, _run_shard, shard_config
+from src.telegram_bot import process_reactions
+
+
+class FakeProcess:
+    """Stand-in for a shard process that records how it was started."""
+
+    def __init__(self, target, args, name):
+        self.args = args
+        self.name = name
+        self.alive = False
+        self.exitcode = None
+
+    def start(self):
+        self.alive = True
+
+    def is_alive(self):
+        return self.alive
+
+    def terminate(self):
+        self.alive = False
+        self.exitcode = -15
+
+    def join(self, timeout=None):
+        pass
+
+
+class TestHashRing(unittest.TestCase):
+
+    def test_spreads_channels_evenly(self):
+        """Every shard gets a fair share of the channels."""
+        ring = HashRing(['a', 'b', 'c', 'd'])
+        assignment = ring.assign(range(4000))
+
+        self.assertEqual(sum(len(channels) for channels in assignment.values()), 4000)
+        for channels in assignment.values():
+            self.assertGreater(len(channels), 500)
+
+    def test_removing_a_shard_only_moves_its_channels(self):
+        """Channels of the surviving shards stay where they were."""
+        ring = HashRing(['a', 'b', 'c'])
+        before = {channel: ring.node_for(channel) for channel in range(1000)}
+        ring.remove('b')
+        after = {channel: ring.node_for(channel) for channel in range(1000)}
+
+        moved = [channel for channel in before if before[channel] != after[channel]]
+        self.assertTrue(moved)
+        self.assertTrue(all(before[channel] == 'b' for channel in moved))
+        self.assertNotIn('b', after.values())
+
+        ring.add('b')
+        self.assertEqual({channel: ring.node_for(channel) for channel in range(1000)}, before)
+
+
+class TestNotificationDedup(unittest.TestCase):
+
+    def test_claims_each_count_once(self):
+        """A count is reported once; a higher count only reports the difference."""
+        dedup = NotificationDedup()
+        key = (5, 10, '👍')
+
+        self.assertEqual(dedup.claim([(key, 3)]), [0])
+        self.assertEqual(dedup.claim([(key, 3), ((5, 11, '👍'), 1)]), [None, 0])
+        self.assertEqual(dedup.claim([(key, 5)]), [3])
+        self.assertEqual(dedup.stats(), {'entries': 2, 'claimed': 3, 'rejected': 1})
+        self.assertEqual(dedup.reported([key, (5, 12, '👍')]), [5, None])
+
+    def test_removed_reactions_can_be_claimed_again(self):
+        """A lower count is recorded, so re-added reactions are reported again."""
+        dedup = NotificationDedup()
+        key = (5, 10, '👍')
+
+        self.assertEqual(dedup.claim([(key, 5)]), [0])
+        self.assertEqual(dedup.claim([(key, 4)]), [None])
+        self.assertEqual(dedup.claim([(key, 5)]), [4])
+
+    def test_entries_expire(self):
+        now = [0.0]
+        dedup = NotificationDedup(ttl=10, max_entries=1, clock=lambda: now[0])
+        dedup.claim([((5, 10, '👍'), 3)])
+        now[0] = 11
+
+        self.assertEqual(dedup.claim([((5, 10, '👍'), 3)]), [0])
+        dedup.claim([((5, 11, '👍'), 1)])
+        self.assertEqual(dedup.stats()['entries'], 1)
+
+    def test_shared_through_manager(self):
+        """The manager serves one table to every process that holds the proxy."""
+        manager = ShardManager()
+        manager.start()
+        try:
+            dedup = manager.NotificationDedup(60, 100)
+            self.assertEqual(dedup.claim([((5, 10, '👍'), 2)]), [0])
+            self.assertEqual(dedup.claim([((5, 10, '👍'), 2)]), [None])
+        finally:
+            manager.shutdown()
+
+
+class TestNotifierDedup(unittest.IsolatedAsyncioTestCase):
+
+    async def test_skips_reactions_reported_by_another_shard(self):
+        """Counts already claimed elsewhere are dropped, partly claimed ones are trimmed."""
+        sent = []
+
+        async def send(text):
+            sent.append(text)
+
+        dedup = NotificationDedup()
+        dedup.claim([((5, 1, '👍'), 3), ((5, 2, '🔥'), 4)])
+        notifier = NotificationQueue(send, window=0.01, dedup=dedup)
+        notifier.start()
+        # Both shards saw these updates while the channel moved, and the other one flushed first
+        await notifier.submit(ReactionNotice(5, 1, '👍', 3, 3))
+        await notifier.submit(ReactionNotice(5, 2, '🔥', 6, 6))
+        await notifier.close()
+
+        self.assertEqual(sent, ["🔥 +2 on msg 2 in channel 5"])
+        self.assertEqual(notifier.stats()['deduplicated'], 1)
+
+    async def test_takeover_continues_from_reported_counts(self):
+        """A shard taking a channel over reports only what was added since the previous shard reported."""
+        sent = []
+
+        async def send(text):
+            sent.append(text)
+
+        dedup = NotificationDedup()
+        dedup.claim([((5, 1, '👍'), 3)])
+        store = ReactionStateStore()
+        store.track(5, 10)  # Messages 1 and 2 predate the tracking of the channel on this shard
+        notifier = NotificationQueue(send, window=0.01, dedup=dedup)
+        notifier.start()
+        client = FakeTelegramClient()
+        config = BotSettings(owner_id=42, max_reactions_per_message=10, fetch_user_data=False, retry_attempts=1,
+                             retry_delay=0)
+        await process_reactions(make_update(5, 1, {'👍': 4}), client, config, state_store=store, notifier=notifier)
+        await process_reactions(make_update(5, 2, {'🔥': 6}), client, config, state_store=store, notifier=notifier)
+        await notifier.close()
+
+        self.assertEqual(sent, ["👍 +1 on msg 1 in channel 5"])
+        self.assertEqual(store.get(5, 2), {'🔥': 6})  # Never reported, so only seeded
+
+    async def test_readded_reaction_is_reported_again(self):
+        """A reaction removed and added back is reported again, as it would be without sharding."""
+        sent = []
+
+        async def send(text):
+            sent.append(text)
+
+        store = ReactionStateStore()
+        store.track(5, 0)
+        notifier = NotificationQueue(send, window=0.01, dedup=NotificationDedup())
+        client = FakeTelegramClient()
+        config = BotSettings(owner_id=42, max_reactions_per_message=10, fetch_user_data=False, retry_attempts=1,
+                             retry_delay=0)
+        for counts in ({'👍': 5}, {'👍': 4}, {'👍': 5}):
+            notifier.start()
+            await process_reactions(make_update(5, 1, counts), client, config, state_store=store, notifier=notifier)
+            await notifier.close()  # One flush per update
+
+        self.assertEqual(sent, ["👍 +5 on msg 1 in channel 5", "👍 +1 on msg 1 in channel 5"])
+        self.assertEqual(notifier.stats()['deduplicated'], 0)
+
+
+class ConnectedOnlyClient(FakeTelegramClient):
+    """Fake client that, like Telethon, cannot send once disconnected."""
+
+    async def send_message(self, entity, message):
+        if not self.is_connected():
+            raise ConnectionError("Cannot send requests while disconnected")
+        return await super().send_message(entity, message)
+
+
+class TestShardProcess(unittest.IsolatedAsyncioTestCase):
+
+    async def test_stop_drains_before_disconnecting(self):
+        """A stop command sends the pending summaries before the shard disconnects."""
+        client = ConnectedOnlyClient(linger=True)
+        control, reports = queue.Queue(), queue.Queue()
+        with tempfile.TemporaryDirectory() as directory:
+            config = benchmark_config(directory, batch_window=60)
+            config['telegram'].update({'session_name': 'a', 'api_id': 1, 'api_hash': 'hash'})
+            config['filters'] = {'watched_channels': [5]}
+            config['catch_up'] = {'enabled': False}
+            store = ReactionStateStore()
+            store.track(5, 0)
+            store.save(config['reaction_state']['snapshot_path'])
+            with patch('src.telegram_bot.create_telegram_client', return_value=client):
+                shard = asyncio.create_task(_run_shard('a', config, None, control, reports))
+                while not client.is_connected():
+                    await asyncio.sleep(0.01)
+                await client.dispatch(make_update(5, 1, {'👍': 1}))
+                control.put(('stop',))
+                await asyncio.wait_for(shard, 5)
+
+        self.assertEqual(client.sent, [(42, "👍 +1 on msg 1 in channel 5")])
+        self.assertFalse(client.is_connected())
+
+
+class TestShardSupervisor(unittest.TestCase):
+
+    def setUp(self):
+        self.now = 0.0
+        self.processes = []
+        config = {
+            'filters': {'watched_channels': list(range(100, 160))},
+            'sharding': {'sessions': ['a', 'b', 'c'], 'heartbeat_timeout': 30, 'restart_delay': 10},
+        }
+        self.supervisor = ShardSupervisor(config, 'config.yaml', process_factory=self.spawn,
+                                          dedup=NotificationDedup(), clock=lambda: self.now)
+        self.supervisor.start()
+
+    def tearDown(self):
+        self.supervisor.stop(timeout=0)
+
+    def spawn(self, target, args, name):
+        process = FakeProcess(target, args, name)
+        self.processes.append(process)
+        return process
+
+    def commands(self, shard_id):
+        control = self.supervisor.shards[shard_id].control
+        commands = []
+        while True:
+            try:
+                commands.append(control.get(timeout=0.5))
+            except queue.Empty:
+                return commands
+
+    def test_assigns_every_channel_once(self):
+        assigned = [channel for process in self.processes for channel in process.args[1]]
+        self.assertEqual(sorted(assigned), list(range(100, 160)))
+
+    def test_moves_channels_of_a_dead_shard(self):
+        """The survivors take over the dead shard's channels, and get them back after its restart."""
+        original = {shard_id: list(shard.channels) for shard_id, shard in self.supervisor.shards.items()}
+        self.supervisor.shards['b'].process.alive = False
+        self.supervisor.check()
+
+        survivors = {shard_id: self.supervisor.shards[shard_id].channels for shard_id in ('a', 'c')}
+        self.assertEqual(sorted(survivors['a'] + survivors['c']), list(range(100, 160)))
+        for shard_id in ('a', 'c'):
+            self.assertTrue(set(original[shard_id]) <= set(survivors[shard_id]))
+            self.assertEqual(self.commands(shard_id), [('assign', survivors[shard_id])])
+
+        self.now = 11
+        self.supervisor.check()
+        self.supervisor.handle_report(('heartbeat', 'b', {}))
+        self.assertEqual(self.supervisor.restarts, 1)
+        self.assertEqual({shard_id: shard.channels for shard_id, shard in self.supervisor.shards.items()}, original)
+
+    def test_fails_shards_that_stop_reporting(self):
+        self.now = 20
+        for shard_id in ('a', 'b'):
+            self.supervisor.handle_report(('heartbeat', shard_id, {}))
+        self.now = 31
+        self.supervisor.check()
+
+        self.assertEqual(self.supervisor.stats()['shards']['c'], {'state': 'failed', 'channels': 0})
+        self.assertFalse(self.supervisor.shards['c'].process.is_alive())
+
+    def test_shard_config(self):
+        config = {'telegram': {'session_name': 'main'}, 'logging': {'log_file': 'logs/bot.log'},
+                  'filters': {'watched_channels': [1, 2, 3]}}
+        sharded = shard_config(config, 'b', [2])
+
+        self.assertEqual(sharded['telegram']['session_name'], 'b')
+        self.assertEqual(sharded['filters']['watched_channels'], [2])
+        self.assertEqual(sharded['logging']['log_file'], 'logs/bot.b.log')
+        self.assertEqual(sharded['reaction_state']['snapshot_path'], 'data/reaction_state.b.json.gz')
+        self.assertEqual(sharded['event_store']['path'], 'data/reactions.b.db')
+        self.assertEqual(config['telegram']['session_name'], 'main')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,17 +1,18 @@
 import os
+import logging
 import unittest
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, AsyncMock
 from src.telegram_bot import (
     load_config,
     setup_logging,
+    shutdown_logging,
     create_telegram_client,
     process_reactions,
     send_message_with_retry,
-    make_api_request
 )
-import asyncio
-from telethon.tl.types import UpdateMessageReactions, PeerChannel, Reaction
-from telethon.tl.custom.reaction import ReactionEmoticon
+from telethon.tl.types import UpdateMessageReactions, PeerChannel, MessageReactions, ReactionCount, ReactionEmoji
+from benchmarks.fake_client import FakeTelegramClient, make_update
+from src.reaction_state import ReactionStateStore
 
 
 class TestTelegramBot(unittest.IsolatedAsyncioTestCase):
@@ -38,15 +39,16 @@ class TestTelegramBot(unittest.IsolatedAsyncioTestCase):
             'LOG_LEVEL': 'INFO'
         }):
             config = load_config('config/config.yaml')
-            self.assertEqual(config['telegram']['api_id'], '123456')
+            self.assertEqual(config['telegram']['api_id'], 123456)
             self.assertEqual(config['telegram']['api_hash'], 'fake_api_hash')
             self.assertEqual(config['telegram']['bot_token'], 'fake_bot_token')
-            self.assertEqual(config['telegram']['owner_id'], '123456789')
+            self.assertEqual(config['telegram']['owner_id'], 123456789)
             self.assertEqual(config['logging']['level'], 'INFO')
 
     def test_setup_logging(self):
         """Test setting up logging with the specified level."""
         setup_logging('logs/test_bot.log', 'DEBUG')
+        self.addCleanup(shutdown_logging)
         logger = logging.getLogger()
         self.assertEqual(logger.level, logging.DEBUG)
 
@@ -54,34 +56,22 @@ class TestTelegramBot(unittest.IsolatedAsyncioTestCase):
     def test_create_telegram_client(self, MockTelegramClient):
         """Test creating a Telegram client."""
         client = create_telegram_client('my_session', '123456', 'fake_api_hash')
-        MockTelegramClient.assert_called_once_with('my_session', '123456', 'fake_api_hash')
+        MockTelegramClient.assert_called_once_with('my_session', '123456', 'fake_api_hash', flood_sleep_threshold=0)
         self.assertIsInstance(client, MagicMock)
 
-    @patch('src.telegram_bot.requests.get')
-    def test_make_api_request(self, mock_get):
-        """Test making a direct API request to the Telegram Bot API."""
-        mock_response = MagicMock()
-        mock_response.json.return_value = {"ok": True, "result": {"id": 123456, "is_bot": True}}
-        mock_response.status_code = 200
-        mock_get.return_value = mock_response
-
-        response = make_api_request('getMe')
-        self.assertTrue(response['ok'])
-        mock_get.assert_called_once()
-
     @patch('src.telegram_bot.TelegramClient')
     async def test_send_message_with_retry(self, MockTelegramClient):
         """Test sending a message with retry logic."""
         mock_client = MockTelegramClient.return_value
-        mock_client.send_message.side_effect = [Exception("Network error"), None]
+        mock_client.send_message = AsyncMock(side_effect=[Exception("Network error"), None])
 
-        await send_message_with_retry(mock_client, 123456789, "Test message", retries=2, delay=1)
+        await send_message_with_retry(mock_client, 123456789, "Test message", retries=2, delay=0.01)
         self.assertEqual(mock_client.send_message.call_count, 2)
 
-    @patch('src.telegram_bot.TelegramClient.iter_participants', return_value=asyncio.sleep(0))
-    async def test_process_reactions(self, mock_iter_participants):
+    async def test_process_reactions(self):
         """Test processing reactions to a message."""
-        mock_client = MagicMock()
+        client = FakeTelegramClient(participants=2)
+        client.reactors[(12345, 1234)] = {'👍': [2]}
         config = {
             'advanced_settings': {
                 'max_reactions_per_message': 10,
@@ -96,15 +86,38 @@ class TestTelegramBot(unittest.IsolatedAsyncioTestCase):
             }
         }
 
-        event = MagicMock()
-        event.message_id = 1234
-        event.peer = PeerChannel(channel_id=12345)
-        event.reactions = UpdateMessageReactions(results=[
-            Reaction(count=1, reaction=ReactionEmoticon(emoticon='👍'))
-        ])
+        event = UpdateMessageReactions(
+            peer=PeerChannel(channel_id=12345),
+            msg_id=1234,
+            reactions=MessageReactions(results=[
+                ReactionCount(reaction=ReactionEmoji(emoticon='👍'), count=1)
+            ])
+        )
+
+        await process_reactions(event, client, config)
+        self.assertEqual(client.calls['send_message'], 1)  # Only the user who reacted, not every participant
+        self.assertIn('User user2 (ID: 2', client.sent[0][1])
+        self.assertIn('reacted with 👍 to message ID 1234', client.sent[0][1])
+
+    async def test_evicted_message_is_not_reported_in_full(self):
+        """A live update for a message whose counts were evicted is stored, not reported as all new."""
+        client = FakeTelegramClient()
+        config = {
+            'advanced_settings': {'max_reactions_per_message': 10, 'fetch_user_data': False},
+            'telegram': {'owner_id': 123456789},
+            'notifications': {'retry_attempts': 1, 'retry_delay': 0},
+        }
+        store = ReactionStateStore(max_messages=1)
+        store.track(1, 0)
+        await process_reactions(make_update(1, 10, {'👍': 36}), client, config, state_store=store)
+        await process_reactions(make_update(1, 20, {'👍': 1}), client, config, state_store=store)  # Evicts 10
+        client.sent.clear()
 
-        await process_reactions(event, mock_client, config)
-        mock_client.send_message.assert_called()
+        await process_reactions(make_update(1, 10, {'👍': 37}), client, config, state_store=store)
+        self.assertEqual(client.sent, [])
+        await process_reactions(make_update(1, 10, {'👍': 38}), client, config, state_store=store)
+        self.assertEqual(len(client.sent), 1)
+        self.assertIn('received 1 new 👍 reaction(s)', client.sent[0][1])
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,67 @@
+import os
+import tempfile
+import unittest
+
+from telethon.tl.types import (
+    MessageReactions,
+    PeerChannel,
+    PeerUser,
+    UpdateMessageReactions,
+    UpdateUserTyping,
+    SendMessageTypingAction,
+)
+
+from src.update_filter import UpdateFilter, normalize_channel_id
+
+
+def reactions_update(peer):
+    return UpdateMessageReactions(peer=peer, msg_id=1, reactions=MessageReactions(results=[]))
+
+
+class TestUpdateFilter(unittest.TestCase):
+
+    def test_normalize_channel_id(self):
+        """Marked channel IDs are reduced to bare IDs."""
+        self.assertEqual(normalize_channel_id(-1001234567890), 1234567890)
+        self.assertEqual(normalize_channel_id(1234567890), 1234567890)
+
+    def test_filters_irrelevant_types(self):
+        """Updates of other types are counted and rejected."""
+        update_filter = UpdateFilter()
+
+        self.assertFalse(update_filter(UpdateUserTyping(user_id=1, action=SendMessageTypingAction())))
+        self.assertTrue(update_filter(reactions_update(PeerChannel(5))))
+        self.assertEqual(update_filter.stats()['filtered_type'], 1)
+        self.assertEqual(update_filter.stats()['accepted'], 1)
+
+    def test_filters_unwatched_channels(self):
+        """Only channels on the watch-list are accepted, and non-channel peers never are."""
+        update_filter = UpdateFilter(watched_channels=[-1000000000005])
+
+        self.assertTrue(update_filter(reactions_update(PeerChannel(5))))
+        self.assertFalse(update_filter(reactions_update(PeerChannel(6))))
+        self.assertFalse(update_filter(reactions_update(PeerUser(5))))
+        self.assertEqual(update_filter.stats()['filtered_channel'], 2)
+
+    def test_unknown_update_type(self):
+        """A misspelled update type is a configuration error."""
+        with self.assertRaises(ValueError):
+            UpdateFilter(update_types=['UpdateMessageReaction'])
+
+    def test_reload_applies_config_changes(self):
+        """Editing the config file replaces the watch-list on the next reload."""
+        update_filter = UpdateFilter()
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'config.yaml')
+            with open(path, 'w') as file:
+                file.write("filters:\n  watched_channels: [7]\n")
+
+            self.assertTrue(update_filter.reload(path))
+            self.assertFalse(update_filter.reload(path))
+
+        self.assertEqual(update_filter.watched, frozenset({7}))
+        self.assertFalse(update_filter(reactions_update(PeerChannel(5))))
+
+
+if __name__ == '__main__':
+    unittest.main()